@@ -58,9 +58,17 @@
 #                   point. If N failures in a row, restart camera.
 #                   Parameter: camera.retries
 #
+#   2026-10-18  Todd Valentic
+#               Pack the record header with a single precompiled struct
+#                   and write the image pixels with write_image_buffer()
+#                   instead of unpacking every pixel into struct.pack().
+#               Read the free disk space straight from the structured
+#                   system status in the cache, no INI parsing.
+#
 ###################################################################
 
 from NightDataMonitor import NightDataMonitorComponent
+from CameraController import write_image_buffer
 from Transport.Util import datefunc
 
 import os
@@ -68,8 +76,10 @@ import sys
 import time
 import struct
 import commands
-import ConfigParser
-import StringIO
+
+# Version 3 image record header (see write() below)
+
+HEADER = struct.Struct('!Bi40sffi40s40s40sfiiiiiiiffi')
 
 class CameraMonitor(NightDataMonitorComponent):
 
@@ -299,20 +309,19 @@ class CameraMonitor(NightDataMonitorComponent):
 
         # Check system conditions such as disk space
 
-        systemStatus = ConfigParser.ConfigParser()
+        systemStatus = self.getCache('system')
 
-        try:
-            buffer = StringIO.StringIO(self.getCache('system'))
-            systemStatus.readfp(buffer)
-        except: 
-            self.log.exception('Failed to get system status from cache')
+        if not isinstance(systemStatus,dict):
+            self.log.error('Failed to get system status from cache')
             return False
 
-        if not systemStatus.has_section(self.diskMount):
+        mounts = systemStatus.get('mounts',{})
+
+        if self.diskMount not in mounts:
             self.log.info('Skipping - data mount missing')
             return False
 
-        freeBytes = systemStatus.getint(self.diskMount,'freebytes')
+        freeBytes = mounts[self.diskMount]['freebytes']
 
         self.log.debug('Disk free: %s, min: %s' % (freeBytes,self.diskFree))
 
@@ -374,27 +383,31 @@ class CameraMonitor(NightDataMonitorComponent):
 
         start_time = int(datefunc.datetime_as_seconds(data.start_time))
 
-        output.write(struct.pack('!B',version))
-        output.write(struct.pack('!i',start_time))
-        output.write(struct.pack('!40s',self.station))
-        output.write(struct.pack('!f',data.latitude))
-        output.write(struct.pack('!f',data.longitude))
-        output.write(struct.pack('!i',self.camera.camera_serial))
-        output.write(struct.pack('!40s',self.camera.device_name))
-        output.write(struct.pack('!40s',data.label))
-        output.write(struct.pack('!40s',data.instrument))
-        output.write(struct.pack('!f',data.exposure_time))
-        output.write(struct.pack('!i',data.x))
-        output.write(struct.pack('!i',data.y))
-        output.write(struct.pack('!i',data.w))
-        output.write(struct.pack('!i',data.h))
-        output.write(struct.pack('!i',data.bytes_per_pixel))
-        output.write(struct.pack('!i',data.bin_x))
-        output.write(struct.pack('!i',data.bin_y))
-        output.write(struct.pack('!f',data.ccd_temp))
-        output.write(struct.pack('!f',data.set_point))
-        output.write(struct.pack('!i',data.image_bytes))
-        output.write(struct.pack('!%dH' % data.image_size,*data.image_buffer))
+        header = HEADER.pack(
+            version,
+            start_time,
+            self.station,
+            data.latitude,
+            data.longitude,
+            self.camera.camera_serial,
+            self.camera.device_name,
+            data.label,
+            data.instrument,
+            data.exposure_time,
+            data.x,
+            data.y,
+            data.w,
+            data.h,
+            data.bytes_per_pixel,
+            data.bin_x,
+            data.bin_y,
+            data.ccd_temp,
+            data.set_point,
+            data.image_bytes
+            )
+
+        output.write(header)
+        write_image_buffer(output, data.image_buffer)
 
 if __name__ == '__main__':
     CameraMonitor(sys.argv).run()
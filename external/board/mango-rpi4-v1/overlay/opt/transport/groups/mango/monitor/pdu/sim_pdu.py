@@ -1,8 +1,19 @@
 #!/usr/bin/env python
 
 # Listen with nc -u 127.0.0.1 8880
+#
+# Simulated PDUv2. Keeps the rail state so SP commands show up in
+# RP/RS, and can add a per command latency plus the time to send
+# the response over a serial line (-b 19200) for latency/throughput
+# tests. It can also be started in-process with SimPDU().start().
+#
+#   2026-10-18  Todd Valentic
+#               Keep rail state, handle SP, latency model, command counts
 
 import socket
+import optparse
+import threading
+import time
 
 class UDPServer(object):
 
@@ -22,38 +33,34 @@ class UDPServer(object):
             traceback.print_exception(*exc_info)
         self._sock.close()
 
-def ReadHeater():
+def ReadHeater(pdu):
     return 'RH 0 0 0 0 0 0 0 0 *'
 
-def ReadPower():
-    return 'RP 0 0 0 0 0 0 0 0 0 0 0 *'
+def ReadPower(pdu):
+    # MSB first
+    return 'RP %s *' % ' '.join([str(x) for x in reversed(pdu.commanded)])
 
-def ReadRails():
-    return 'RS 0 0 0 0 0 0 0 0 0 0 0 *'
+def ReadRails(pdu):
+    return 'RS %s *' % ' '.join([str(x) for x in reversed(pdu.actual)])
 
-def ReadTemps():
+def ReadTemps(pdu):
     return 'RT 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 *'
 
-def ReadBME():
+def ReadBME(pdu):
     return 'RBME 25.40 1019.33 -50.48 37.39 *'
 
-def ReadLTC():
-    return """RLTC
-1 102.4 0.0
-2 102.4 0.0
-3 102.4 0.0
-4 102.4 0.0
-5 102.4 0.0
-6 102.4 0.0
-7 102.4 0.0
-8 102.4 0.0
-9 102.4 0.0
-10 102.4 0.0
-11 102.4 0.0
-12 102.4 0.0
-*"""
-
-def ReadTS():
+def ReadLTC(pdu):
+    lines = ['RLTC']
+    for rail in range(12):
+        if rail < len(pdu.actual) and pdu.actual[rail]:
+            amps = 0.5
+        else:
+            amps = 0.0
+        lines.append('%d 102.4 %.1f' % (rail+1,amps))
+    lines.append('*')
+    return '\n'.join(lines)
+
+def ReadTS(pdu):
     return """RTS
 1 -40.0 -30.0 3
 2 0.0 0.0 0
@@ -77,30 +84,113 @@ def ReadTS():
 20 0.0 -35.0 2
 *"""
 
+def SetPower(pdu,rail,state):
+    index = int(rail)-1
+    value = int(state.lower() in ['on','1'])
+    pdu.commanded[index] = value
+    pdu.actual[index] = value
+    return 'SP %d %s *' % (index+1,state)
+
 handler = {
-    'RH':   ReadHeater(),
-    'RP':   ReadPower(),
-    'RS':   ReadRails(),
-    'RT':   ReadTemps(),
-    'RBME': ReadBME(),
-    'RLTC': ReadLTC(),
-    'RTS':  ReadTS()
+    'RH':   ReadHeater,
+    'RP':   ReadPower,
+    'RS':   ReadRails,
+    'RT':   ReadTemps,
+    'RBME': ReadBME,
+    'RLTC': ReadLTC,
+    'RTS':  ReadTS,
+    'SP':   SetPower
 }
 
-if __name__ == '__main__':
+class SimPDU(object):
 
-    host = '127.0.0.1'
-    port = 8880
+    def __init__(self,host='127.0.0.1',port=8880,latency=0,baud=0,
+                 rails=11,verbose=False):
+        self.host = host
+        self.port = port
+        self.latency = latency      # seconds per command
+        self.baud = baud            # 0 = no serial line delay
+        self.verbose = verbose
 
-    with UDPServer(host,port) as s:
-        while True:
-            cmd,addr = s.recvfrom(1024)
+        self.commanded = [0]*rails
+        self.actual = [0]*rails
+        self.counts = {}
+
+        self.sock = None
+
+    def handle(self,cmd):
+
+        parts = cmd.split()
+
+        if parts:
+            self.counts[parts[0]] = self.counts.get(parts[0],0)+1
+
+        try:
+            msg = handler[parts[0]](self,*parts[1:])
+        except:
+            msg = 'Error'
+
+        delay = self.latency
+        if self.baud:
+            # 10 bits per byte on the wire, both directions
+            delay += (len(cmd)+len(msg))*10.0/self.baud
+
+        if delay:
+            time.sleep(delay)
+
+        return msg
+
+    def numCommands(self):
+        return sum(self.counts.values())
+
+    def serve(self,sock):
 
-            print 'cmd: %s, addr: %s' % (cmd,addr)
+        # One at a time, just like the serial line
 
+        while True:
             try:
-                msg = handler[cmd.strip()]
-            except:
-                msg = 'Error'
+                cmd,addr = sock.recvfrom(1024)
+            except socket.error:
+                break
+
+            if self.verbose:
+                print 'cmd: %s, addr: %s' % (cmd,addr)
+
+            sock.sendto(self.handle(cmd.strip()),addr)
+
+    def start(self):
+        """Run in a background thread, return the bound address."""
+
+        self.sock = socket.socket(socket.AF_INET,socket.SOCK_DGRAM)
+        self.sock.bind((self.host,self.port))
+
+        thread = threading.Thread(target=self.serve,args=(self.sock,))
+        thread.daemon = True
+        thread.start()
+
+        return '%s:%d' % self.sock.getsockname()
+
+    def stop(self):
+        if self.sock:
+            self.sock.close()
+        self.sock = None
+
+if __name__ == '__main__':
+
+    parser = optparse.OptionParser()
+    parser.add_option('--host',default='127.0.0.1')
+    parser.add_option('-p','--port',type='int',default=8880)
+    parser.add_option('-l','--latency',type='float',default=0,
+                      help='seconds added to each command')
+    parser.add_option('-b','--baud',type='int',default=0,
+                      help='simulate the serial line speed')
+    parser.add_option('-q','--quiet',action='store_true')
+
+    (options,args) = parser.parse_args()
+
+    pdu = SimPDU(options.host,options.port,options.latency,options.baud,
+                 verbose=not options.quiet)
+
+    with UDPServer(options.host,options.port) as s:
+        pdu.serve(s)
 
-            s.sendto(msg,addr)
@@ -39,24 +39,57 @@
 #                   a work around, we redefine abort in the component
 #                   and raise the error there.
 #
+#   2026-10-18  Todd Valentic
+#               Add watch mode (filegroup.*.watch). New files are found
+#                   with inotify and an on-disk index of posted files
+#                   (see filewatch.py) rather than running find -newer
+#                   every poll.
+#               Fix typo in flagfile assignment.
+#               Fix removeFiles with maxFiles (was undefined names).
+#
+#               When every filegroup is watched, block on the inotify
+#                   descriptors (up to watch.timeout) instead of
+#                   polling, so new files are posted
+#                   as soon as they are closed.
+#
+#               Post filegroups concurrently with a bounded pool of
+#                   workers (see postqueue.py). Parameters:
+#                   workers (default 1), filegroup.*.priority and
+#                   filegroup.*.bandwidth (bytes/sec, 0 = no limit)
+#               Compress in chunks rather than reading the whole file,
+#                   and don't recompress .bz2 or .gz files.
+#               Compress into a private directory under the group's
+#                   spool.path (default <filegroup>.spool) so groups
+#                   posting at the same time don't share temp files.
+##               Watched groups that run out of files are checked
+#                   again while the other groups are still posting,
+#                   so new files don't wait for the end of the pass.
+#
 ############################################################################
 
 from Transport      import ProcessClient
 from Transport      import NewsPostMixin
 from Transport      import ConfigComponent
 from Transport.Util import PatternTemplate, removeFile, sizeDesc
+from Transport.Util import datefunc
 from dateutil       import parser
 
 import re
 import os
-import bz2
 import sys
 import time
 import commands
+import shutil
+import tempfile
 import pytz
 import datetime
 import uuid
 
+from filewatch import FileWatcher, waitAny
+from postqueue import PostScheduler, Throttle
+
+import compression
+
 class FileGroup(ConfigComponent, NewsPostMixin):
 
     def __init__(self,name,parent):
@@ -75,14 +108,18 @@ class FileGroup(ConfigComponent, NewsPostMixin):
         self.matchPaths     = self.getList('match.paths','*')
         self.matchNames     = self.getList('match.names','*')
         self.compress       = self.getboolean('compress',False)
+        self.compressCodec  = self.get('compress.codec','bz2')
+        self.priority       = self.getint('priority',0)
+        self.bandwidth      = self.getBytes('bandwidth',0)
         self.removeFiles    = self.getboolean('removeFiles',False)
         self.includeLast    = self.getboolean('includeLast',True)
         self.startCurrent   = self.getboolean('startCurrent',False)
         self.maxFiles       = self.getint('maxFiles')
         self.enableParseTime = self.getboolean('parseTime',True)
         self.enableSerialNum = self.getboolean('serialNum',False)
+        self.watch          = self.getboolean('watch',False)
 
-        sduring elf.flagfile       = self.get('flagfile','relay')
+        self.flagfile       = self.get('flagfile','relay')
 
         self.pathRule       = PatternTemplate('path','/')
 
@@ -90,6 +127,15 @@ class FileGroup(ConfigComponent, NewsPostMixin):
 
         self.posters        = {}
         self.timeFilename   = '%s.timestamp' % name
+        self.spoolPath      = self.get('spool.path','%s.spool' % name)
+        self.throttle       = Throttle(self.bandwidth,sleep=self.wait)
+
+        # Compressed copies from an earlier run are left over
+
+        if os.path.isdir(self.spoolPath):
+            shutil.rmtree(self.spoolPath,ignore_errors=True)
+
+        os.makedirs(self.spoolPath)
 
         flagdir = os.path.dirname(self.flagfile)
         if flagdir and not os.path.exists(flagdir):
@@ -108,6 +154,35 @@ class FileGroup(ConfigComponent, NewsPostMixin):
         self.log.info('   - match paths %s' % ' '.join(self.matchPaths))
         self.log.info('   - match names %s' % ' '.join(self.matchNames))
 
+        if self.watch:
+            self.watcher = self.startWatcher()
+        else:
+            self.watcher = None
+
+    def startWatcher(self):
+
+        indexFilename = self.get('watch.index','%s.index' % self.name)
+        indexMaxLines = self.getint('watch.index.maxLines',10000)
+
+        watcher = FileWatcher(self.startPath, indexFilename,
+                              self.matchPaths, self.matchNames,
+                              maxLines=indexMaxLines,
+                              log=self.log)
+
+        # Carry over the state from the timestamp file the
+        # first time through (or if the index was removed).
+
+        if os.path.exists(indexFilename):
+            cutoff = None
+        else:
+            cutoff = os.path.getmtime(self.timeFilename)
+
+        watcher.start(cutoff)
+
+        self.log.info('   - using inotify watch')
+
+        return watcher
+
     def my_abort(self):
         """Replace the standard abort() and raise exception instead"""
 
@@ -141,14 +216,17 @@ class FileGroup(ConfigComponent, NewsPostMixin):
 
         return timestamp
  
-    def post(self, pathname):
+    def post(self, pathname, rulePath=None):
 
         if self.enableParseTime:
             timestamp = self.parseTime(os.path.basename(pathname))
         else:
             timestamp = None
 
-        newsgroup = self.pathRule(self.newsgroupTemplate,pathname)
+        # rulePath is the name the newsgroup template sees (the
+        # compressed copies used to be made in the working directory)
+
+        newsgroup = self.pathRule(self.newsgroupTemplate,rulePath or pathname)
         filesize = os.path.getsize(pathname)
 
         self.log.info('  - posting %s (%s) to %s' % (pathname,sizeDesc(filesize),newsgroup))
@@ -172,44 +250,60 @@ class FileGroup(ConfigComponent, NewsPostMixin):
 
         self.log.info('Processing %s' % pathname)
 
-        bzipext         = '.bz2'
         basename        = os.path.basename(pathname)
-        baseext         = os.path.splitext(basename)[1]
-        isCompressed    = baseext==bzipext
-        zipname         = basename+bzipext
+        isCompressed    = compression.isCompressed(basename)
+        spooldir        = None
 
-        if self.compress and not isCompressed:
+        try:
 
-            self.log.debug('  - compressing file')
-            data = open(pathname).read()
-            open(zipname,'w').write(bz2.compress(data))
+            if self.compress and not isCompressed:
 
-            orgsize = os.path.getsize(pathname)
-            zipsize = os.path.getsize(zipname)
+                self.log.debug('  - compressing file')
 
-            if orgsize>0:
-                zippct  = (zipsize/float(orgsize))*100
-            else:
-                zippct  = 0
+                # Private directory so the posted name stays the same
+                # and groups running at the same time can't collide
 
-            self.log.info('  - %s -> %s (%d%%)' % \
-                (sizeDesc(orgsize),sizeDesc(zipsize),zippct))
+                spooldir = tempfile.mkdtemp(prefix='post-',dir=self.spoolPath)
+                zipname  = os.path.join(spooldir,
+                                basename+compression.extension(self.compressCodec))
 
-            postfile = zipname
+                orgsize,zipsize = compression.copyFile(pathname,zipname,
+                                                       self.compressCodec,
+                                                       sync=False)
 
-        else:
+                if orgsize>0:
+                    zippct  = (zipsize/float(orgsize))*100
+                else:
+                    zippct  = 0
+
+                self.log.info('  - %s -> %s (%d%%)' % \
+                    (sizeDesc(orgsize),sizeDesc(zipsize),zippct))
+
+                postfile = zipname
+                rulePath = os.path.basename(zipname)
+
+            else:
 
-            postfile = pathname
+                postfile = pathname
+                rulePath = pathname
 
-        self.post(postfile)
+            postsize = os.path.getsize(postfile)
 
-        # Cleanup files
+            self.post(postfile,rulePath)
+            self.throttle(postsize)
 
-        removeFile(zipname)
+        finally:
+
+            # Cleanup the compressed copy we made
+
+            if spooldir:
+                shutil.rmtree(spooldir,ignore_errors=True)
 
         if self.removeFiles:
             removeFile(pathname)
 
+        return postsize
+
     def joinList(self, name, parts):
 
         result = ['-%s "%s"' % (name, part) for part in parts] 
@@ -220,6 +314,15 @@ class FileGroup(ConfigComponent, NewsPostMixin):
 
     def findFiles(self):
 
+        if self.watcher:
+            filelist = self.watcher.poll()
+        else:
+            filelist = self.findNewerFiles()
+
+        return self.selectFiles(filelist)
+
+    def findNewerFiles(self):
+
         names = self.joinList('name', self.matchNames)
         paths = self.joinList('path', self.matchPaths)
 
@@ -237,18 +340,48 @@ class FileGroup(ConfigComponent, NewsPostMixin):
         filelist = [f for f in filelist if not os.path.basename(f).startswith('.')]
         filelist.sort()
 
+        return filelist
+
+    def selectFiles(self,filelist):
+
         if not self.includeLast:
             filelist = filelist[0:-1]       # don't include the current file
 
         if self.maxFiles:                   # keep only the last N files
 
-            if self.removeFiles:
-                removeFiles(filelist[:-maxFiles])
+            skipped = filelist[:-self.maxFiles]
+
+            for pathname in skipped:
+                if self.removeFiles:
+                    removeFile(pathname)
+                if self.watcher:
+                    self.watcher.markDone(pathname)
 
             filelist = filelist[-self.maxFiles:]
 
         return filelist
 
+    def postFile(self,pathname):
+
+        try:
+            timestamp=os.path.getmtime(pathname)
+        except OSError:
+            # Removed since we found it
+            if self.watcher:
+                self.watcher.markRemoved(pathname)
+            return 0
+
+        postsize = self.processFile(pathname)
+        os.utime(self.timeFilename,(timestamp,timestamp))
+
+        if self.watcher:
+            if self.removeFiles:
+                self.watcher.markRemoved(pathname)
+            else:
+                self.watcher.markDone(pathname,timestamp)
+
+        return postsize
+
     def process(self):
 
         pathnames = self.findFiles()
@@ -259,9 +392,7 @@ class FileGroup(ConfigComponent, NewsPostMixin):
             if not self.running:
                 break 
 
-            timestamp=os.path.getmtime(pathname)
-            self.processFile(pathname)
-            os.utime(self.timeFilename,(timestamp,timestamp))
+            self.postFile(pathname)
 
 class PostFiles(ProcessClient):
 
@@ -270,9 +401,27 @@ class PostFiles(ProcessClient):
 
         self.pollrate = self.getRate('pollrate', '5:00')
         self.exitOnError = self.getboolean('exitOnError', False)
+        self.workers = self.getint('workers', 1)
+
+        self.watchTimeout = self.getDeltaTime('watch.timeout', 60)
+        self.watchTimeout = datefunc.timedelta_as_seconds(self.watchTimeout)
 
         self.filegroups = self.getComponentsList('filegroups', FileGroup)
 
+        # If every filegroup is watched, we wait on inotify instead
+        # of the find based polling (see waitForFiles).
+
+        watched = [filegroup.watch for filegroup in self.filegroups]
+
+        self.watchAll = bool(self.filegroups) and all(watched)
+        self.checkNow = True
+
+        self.scheduler = PostScheduler(self.workers,
+                                       log=self.log,
+                                       isRunning=lambda: self.running,
+                                       exitOnError=self.exitOnError,
+                                       refill=self.checkGroups)
+
     def preprocess(self):
         return
 
@@ -283,9 +432,11 @@ class PostFiles(ProcessClient):
 
         self.preprocess()
 
+        work = []
+
         for filegroup in self.filegroups:
             try:
-                filegroup.process()
+                work.append((filegroup, filegroup.findFiles()))
             except SystemExit:
                 self.running = False
             except:
@@ -296,11 +447,49 @@ class PostFiles(ProcessClient):
             if not self.running:
                 break
 
+        if self.running and not self.scheduler.run(work):
+            self.running = False
+
         self.postprocess()
 
+    def checkGroups(self, groups, timeout, isRunning):
+        # Called by the scheduler during a pass for the groups that
+        # have run out of files. Only watched groups are cheap enough
+        # to check again, the others wait for the next pass.
+
+        watchers = dict([(filegroup.watcher, filegroup)
+                         for filegroup in groups if filegroup.watcher])
+
+        if not watchers:
+            return []
+
+        ready = waitAny(watchers.keys(), timeout, isRunning)
+
+        return [watchers[watcher] for watcher in ready]
+
+    def waitForFiles(self):
+        # Returns as soon as a watched directory has events, or after
+        # watch.timeout (the rescan rate if inotify isn't available).
+
+        if self.checkNow:
+            # Post what the startup scan found right away
+            self.checkNow = False
+            return self.running
+
+        watchers = [filegroup.watcher for filegroup in self.filegroups]
+
+        waitAny(watchers, self.watchTimeout, lambda: self.running)
+
+        return self.running
+
     def run(self):
 
-        while self.wait(self.pollrate):
+        if self.watchAll:
+            wait = self.waitForFiles
+        else:
+            wait = lambda: self.wait(self.pollrate)
+
+        while wait():
             try:
                 self.process()
             except SystemExit:
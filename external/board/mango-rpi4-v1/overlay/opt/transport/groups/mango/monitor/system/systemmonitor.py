@@ -26,12 +26,19 @@
 #   2019-06-10  Todd Valentic
 #               Use new cache methods
 #
+#   2026-10-18  Todd Valentic
+#               Collect in process with a persistent SystemCollector
+#                   (sysstats.py) instead of running systemstatus.py
+#                   for every sample. The cache now holds the
+#                   structured data, the saved output is still the
+#                   INI text. Parameters: static.rate, profile.
+#
 ##################################################################
 
 from DataMonitor import DataMonitorComponent
+from Transport.Util import datefunc
 
-import commands
-import tarfile
+from sysstats import SystemCollector, toConfig
 
 class SystemMonitor (DataMonitorComponent):
 
@@ -39,23 +46,40 @@ class SystemMonitor (DataMonitorComponent):
         DataMonitorComponent.__init__(self,*pos,**kw)
 
         self.saveOutput = self.getboolean('saveOutput',True)
+        self.profile    = self.getboolean('profile',False)
+
+        staticRate = self.getDeltaTime('static.rate',3600)
+        staticRate = datefunc.timedelta_as_seconds(staticRate)
+
+        self.collector = SystemCollector(staticRate=staticRate,
+                                         profile=self.profile,
+                                         log=self.log)
+
+        self.release = {
+            'release.version':  self.get('release.version'),
+            'release.date':     self.get('release.date')
+            }
 
         self.versions  = '[Versions]\n'
-        self.versions += 'release.version: %s\n' % self.get('release.version')
-        self.versions += 'release.date: %s\n' % self.get('release.date')
+        self.versions += 'release.version: %s\n' % self.release['release.version']
+        self.versions += 'release.date: %s\n' % self.release['release.date']
 
     def sample(self):
-        status,output = commands.getstatusoutput('systemstatus.py')
 
-        output += self.versions
+        data = self.collector.update()
+        data['versions'] = self.release
 
-        if status!=0:
-            raise IOError(output)
+        if self.profile:
+            info = data['collector']
+            self.log.info('Collector cycle %d: cpu %.2f ms (avg %.2f ms), wall %.2f ms' % \
+                (info['cycles'],info['cpu']*1000,info['avgcpu']*1000,info['wall']*1000))
+            for name,secs in sorted(info['sections'].items()):
+                self.log.info('  %-12s %.2f ms' % (name,secs*1000))
 
-        self.putCache('system',output)
+        self.putCache('system',data)
 
         if self.saveOutput:
-            return output
+            return toConfig(data)+self.versions
 
         return None
 
@@ -26,6 +26,26 @@
 #   2021-07-21  Todd Valentic
 #               Simplify timeouts to always be in secs
 #
+#   2026-10-18  Todd Valentic
+#               Add bulk get_many, put_many and snapshot so clients
+#                   can replace N round trips with one.
+#
+#               Keep a bounded history of the numeric values for each
+#                   key in ring buffers (see history.py). New history,
+#                   aggregate and memory calls. Parameters:
+#                   history.keys, history.capacity, history.maxFields
+#                   and history.maxKeys.
+#               Expire keys from a heap instead of scanning all of
+#                   the timeouts on every callback.
+#               Send event notifications from a background thread,
+#                   batched every event.batch.wait secs, so put()
+#                   does not wait on the event service. Only the
+#                   latest value is sent if a key is put again before
+#                   the batch goes out.
+#               Drop the history of a key when it is cleared or
+#                   expires, so its history.maxKeys slot is freed.
+#               Return missing history values as None, not NaN.
+#
 ###################################################################
 
 from Transport  import ProcessClient
@@ -33,7 +53,14 @@ from Transport  import XMLRPCServerMixin
 from Transport.Util import datefunc
 
 import sys
+import time
+import heapq
+import fnmatch
 import datetime
+import threading
+
+from history import Series
+from rpcclient import ServiceClient
 
 class Server(ProcessClient,XMLRPCServerMixin):
 
@@ -45,28 +72,82 @@ class Server(ProcessClient,XMLRPCServerMixin):
         self.register_function(self.get_value_default,'get_or_default')
         self.register_function(self.get_age,'get_age')
         self.register_function(self.put)
+        self.register_function(self.get_many)
+        self.register_function(self.put_many)
+        self.register_function(self.snapshot)
         self.register_function(self.list)
         self.register_function(self.lookup)
         self.register_function(self.clear_value,'clear')
         self.register_function(self.set_timeout,'set_timeout')
         self.register_function(self.get_timeout,'get_timeout')
         self.register_function(self.clear_timeout,'clear_timeout')
+        self.register_function(self.history)
+        self.register_function(self.aggregate)
+        self.register_function(self.memory)
 
-        self.event = self.connect('event')
+        self.historyKeys        = self.getList('history.keys','*')
+        self.historyCapacity    = self.getint('history.capacity',720)
+        self.historyMaxFields   = self.getint('history.maxFields',32)
+        self.historyMaxKeys     = self.getint('history.maxKeys',64)
+        self.eventBatchWait     = self.getDeltaTime('event.batch.wait',1)
+        self.eventBatchWait     = datefunc.timedelta_as_seconds(self.eventBatchWait)
 
         self.cache = {}
         self.timestamp = {}
         self.timeouts = {}           
+        self.putTime = {}
+        self.deadlines = []         # heap of (unix time,key)
+        self.scheduled = {}         # key -> earliest deadline on the heap
+        self.series = {}
+
+        # Event notifications are sent by a background thread
+
+        self.eventLock = threading.Condition()
+        self.eventPending = {}      # key -> value, latest wins
+        self.eventOrder = []
+        self.eventStats = dict(sent=0,coalesced=0,errors=0,batches=0)
+
+        self.eventThread = threading.Thread(target=self.eventSender)
+        self.eventThread.daemon = True
+        self.eventThread.start()
 
     def expire(self):
-        
-        for key,timeout in self.timeouts.items():
-            if key in self.cache:
-                if self.get_age(key) > timeout:
-                    self.clear_value(key)
+
+        now = time.time()
+
+        while self.deadlines and self.deadlines[0][0] <= now:
+            deadline,key = heapq.heappop(self.deadlines)
+            if self.scheduled.get(key) == deadline:
+                del self.scheduled[key]
+            self.checkExpire(key,now)
+
+    def checkExpire(self,key,now):
+
+        # The key may have been put again or had its timeout changed
+        # since the entry went on the heap. Reschedule if not due yet.
+
+        if key not in self.cache or key not in self.timeouts:
+            return
+
+        if self.putTime[key]+self.timeouts[key] <= now:
+            self.clear_value(key)
+        else:
+            self.scheduleExpire(key)
+
+    def scheduleExpire(self,key):
+
+        if key not in self.cache or key not in self.timeouts:
+            return
+
+        deadline = self.putTime[key]+self.timeouts[key]
+
+        if deadline < self.scheduled.get(key,deadline+1):
+            self.scheduled[key] = deadline
+            heapq.heappush(self.deadlines,(deadline,key))
 
     def set_timeout(self,key,secs):
         self.timeouts[key]=secs
+        self.scheduleExpire(key)
 
     def clear_timeout(self,key):
         if key in self.timeouts:
@@ -78,9 +159,24 @@ class Server(ProcessClient,XMLRPCServerMixin):
     def put(self,key,value):
         self.cache[key] = value
         self.timestamp[key] = self.currentTime() 
-        self.event.notify(key,value)
+        self.putTime[key] = time.time()
+        self.addHistory(key,value)
+        self.queueEvent(key,value)
+        self.scheduleExpire(key)
         return True
 
+    def put_many(self,values):
+        for key,value in values.items():
+            self.put(key,value)
+        return True
+
+    def get_many(self,keys):
+        # Only keys present in the cache are returned
+        return dict([(key,self.cache[key]) for key in keys if key in self.cache])
+
+    def snapshot(self):
+        return self.cache
+
     def get_value(self,key):
         return self.cache[key]
 
@@ -99,12 +195,108 @@ class Server(ProcessClient,XMLRPCServerMixin):
         if key in self.cache:
             del self.cache[key]
             del self.timestamp[key]
-            
+            del self.putTime[key]
+
+        # Free the history slot as well (see history.maxKeys)
+
+        self.series.pop(key,None)
+
         return True
 
     def list(self):
         return self.cache.keys()
 
+    #-- History ----------------------------------------------------------
+
+    def wantHistory(self,key):
+
+        for pattern in self.historyKeys:
+            if fnmatch.fnmatchcase(key,pattern):
+                return True
+
+        return False
+
+    def addHistory(self,key,value):
+
+        if key not in self.series:
+            if len(self.series) >= self.historyMaxKeys:
+                return
+            if not self.wantHistory(key):
+                return
+            self.series[key] = Series(self.historyCapacity,self.historyMaxFields)
+
+        self.series[key].append(time.time(),value)
+
+    def history(self,key,since=0,fields=[]):
+        """Samples for key since the given unix time (None if missing)."""
+
+        if key not in self.series:
+            return dict(times=[],fields={})
+
+        return self.series[key].query(since,fields)
+
+    def aggregate(self,key,interval,since=0,fields=[]):
+        """Mean, min and max for key in interval second bins."""
+
+        if key not in self.series:
+            return dict(times=[],count=[],fields={})
+
+        return self.series[key].aggregate(interval,since,fields)
+
+    def memory(self):
+
+        keys = dict([(key,series.info()) for key,series in self.series.items()])
+
+        return dict(
+            keys        = keys,
+            bytes       = sum([info['bytes'] for info in keys.values()]),
+            maxbytes    = self.historyMaxKeys*8*self.historyCapacity* \
+                            (self.historyMaxFields+1),
+            events      = self.eventStats
+            )
+
+    #-- Event notification -----------------------------------------------
+
+    def queueEvent(self,key,value):
+
+        with self.eventLock:
+            if key in self.eventPending:
+                self.eventStats['coalesced'] += 1
+            else:
+                self.eventOrder.append(key)
+            self.eventPending[key] = value
+            self.eventLock.notify()
+
+    def eventSender(self):
+
+        # Own connection, the proxies are not thread safe
+
+        event = ServiceClient(self.connect('event'),'event',log=self.log)
+
+        while self.running:
+
+            with self.eventLock:
+                while self.running and not self.eventOrder:
+                    self.eventLock.wait(1)
+                batch = [(key,self.eventPending.pop(key)) for key in self.eventOrder]
+                self.eventOrder = []
+
+            if not batch:
+                continue
+
+            try:
+                event.callMany([('notify',(key,value)) for key,value in batch])
+                self.eventStats['sent'] += len(batch)
+            except:
+                self.eventStats['errors'] += 1
+                self.log.exception('Problem sending events')
+
+            self.eventStats['batches'] += 1
+
+            # Let more puts collect before the next batch
+
+            time.sleep(self.eventBatchWait)
+
     def lookup(self,keyword):
         return self.get(keyword)
 
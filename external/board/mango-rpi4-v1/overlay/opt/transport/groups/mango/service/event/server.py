@@ -15,51 +15,35 @@
 #   2007-04-16  Todd Valentic
 #               Fixed bug in unregister if event not registered.
 #
+#   2026-10-18  Todd Valentic
+#               Deliver from per observer queues with a pool of
+#                   worker threads (see delivery.py), so a slow or
+#                   dead observer no longer holds up everyone else.
+#                   Connections are reused, a pending event for the
+#                   same observer is replaced by the newer one and
+#                   failed deliveries are retried with a backoff.
+#                   Parameters: workers, queue.max, queue.policy,
+#                   batch.size, coalesce, retry.max, retry.backoff.min
+#                   and retry.backoff.max.
+#               New getStats and resetStats calls for the per
+#                   observer counts and latency.
+#               Call the observer method with getattr instead of eval.
+#               Fixed removeEvent (wrong variable name).
+#
 ################################################################
 
 from Transport                  import ProcessClient
 from Transport                  import XMLRPCServerMixin
-from Transport                  import AccessMixin
-from threading                  import Thread
+from Transport.Util             import datefunc
+
+from delivery                   import Delivery
 
 import  os
 import  sys
-import  Queue
 import  socket
-import  xmlrpclib
 
 socket.setdefaulttimeout(5)
 
-class WorkerThread(Thread,AccessMixin):
-
-    def __init__(self,parent):
-        Thread.__init__(self)
-        AccessMixin.__init__(self,parent)
-
-        self.queue = self.parent.queue
-
-    def run(self):
-
-        self.log.info('Worker thread starting')
-
-        while self.running:
-
-            try:
-                event,signature,args = self.queue.get(timeout=1)
-            except Queue.Empty:
-                continue
-
-            url,method = signature
-
-            try:
-                client = xmlrpclib.ServerProxy(url)
-                eval('client.%s(*args)' % method)
-            except:
-                self.log.exception('Problem notifying %s for %s (%s)' % \
-                    (signature,event,args))
-
-        self.log.info('Worker thread exiting')
-
 class Server(ProcessClient,XMLRPCServerMixin):
 
     def __init__(self,argv):
@@ -73,16 +57,34 @@ class Server(ProcessClient,XMLRPCServerMixin):
         self.register_function(self.listObservers)
         self.register_function(self.listEvents)
         self.register_function(self.removeEvent)
+        self.register_function(self.getStats)
+        self.register_function(self.resetStats)
 
         # Private methods used for testing
 
         self.register_function(self.testport)
 
+        backoffMin = self.getDeltaTime('retry.backoff.min',1)
+        backoffMax = self.getDeltaTime('retry.backoff.max',60)
+
+        self.delivery = Delivery(
+                            workers     = self.getint('workers',4),
+                            maxQueue    = self.getint('queue.max',100),
+                            policy      = self.get('queue.policy','oldest'),
+                            batchSize   = self.getint('batch.size',10),
+                            coalesce    = self.getboolean('coalesce',True),
+                            maxRetries  = self.getint('retry.max',3),
+                            backoffMin  = datefunc.timedelta_as_seconds(backoffMin),
+                            backoffMax  = datefunc.timedelta_as_seconds(backoffMax),
+                            log         = self.log,
+                            isRunning   = lambda: self.running)
+
+        if self.delivery.policy not in ['oldest','newest']:
+            raise ValueError('Unknown queue.policy: %s' % self.delivery.policy)
+
         self.loadEvents()
 
-        self.queue  = Queue.Queue()
-        self.thread = WorkerThread(self)
-        self.thread.start()
+        self.delivery.start()
 
     def loadEvents(self):
 
@@ -111,7 +113,10 @@ class Server(ProcessClient,XMLRPCServerMixin):
 
         self.log.info('Removing event: %s' % event)
 
-        del self.events[events]
+        for url,method in self.events[event]:
+            self.dropObserver(url,method,event)
+
+        del self.events[event]
         self.saveEvents()
 
     def register(self,event,url,method):
@@ -138,9 +143,22 @@ class Server(ProcessClient,XMLRPCServerMixin):
             if self.events[event]==[]:
                 del self.events[event]
 
+        self.dropObserver(url,method)
+
         self.saveEvents()
         return 1
 
+    def dropObserver(self,url,method,ignore=None):
+        # Throw away the queue once no events are left for it
+
+        signature = (url,method)
+
+        for event,signatures in self.events.items():
+            if event != ignore and signature in signatures:
+                return
+
+        self.delivery.removeObserver(url,method)
+
     def listEvents(self):
         return self.events.keys()
 
@@ -155,9 +173,15 @@ class Server(ProcessClient,XMLRPCServerMixin):
             self.log.info('  - no observers registered')
             return 1
 
-        for signature in self.events[event]:
-            self.queue.put((event,signature,args))
+        self.delivery.notify(event,self.events[event],args)
+
+        return 1
+
+    def getStats(self):
+        return self.delivery.getStats()
 
+    def resetStats(self):
+        self.delivery.resetStats()
         return 1
 
     def testport(self,msg):
@@ -169,7 +193,7 @@ class Server(ProcessClient,XMLRPCServerMixin):
 
         # Need to wait for worker threads
 
-        self.thread.join()
+        self.delivery.stop()
 
         self.log.info('Finished')
 
@@ -18,6 +18,9 @@
 #   2021-06-29  Todd Valentic
 #               Initial implementation. 
 #
+#   2026-10-18  Todd Valentic
+#               Fetch all sources with one cache.get_many() call
+#
 ###################################################################
 
 from Transport  import ProcessClient
@@ -40,7 +43,7 @@ class Server(ProcessClient,XMLRPCServerMixin):
 
     def best(self):
         
-        cacheEntries = self.cache.list()
+        cacheEntries = self.cache.get_many(self.sources)
 
         entry = None
         result = None 
@@ -49,7 +52,7 @@ class Server(ProcessClient,XMLRPCServerMixin):
             if source not in cacheEntries:
                 continue
 
-            entry = self.cache.get(source)
+            entry = cacheEntries[source]
 
             if source=='gps' and entry['mode']<2: 
                 # no position fix
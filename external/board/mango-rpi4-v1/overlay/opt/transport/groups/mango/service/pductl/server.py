@@ -22,11 +22,24 @@
 #   2021-09-22  Todd Valentic
 #               Add support for command retries
 #
+#   2026-10-18  Todd Valentic
+#               Update the cache with one put_many() call in 
+#                   getDeviceState() instead of a put per PDU
+#
+#               Add engine mode (pdu.*.engine: true). Each PDU keeps
+#                   one connection open and a background thread
+#                   publishes a status snapshot every engine.rate.
+#                   Reads are served from the snapshot if it is newer
+#                   than snapshot.maxAge and SP commands are queued
+#                   and coalesced (see pduengine.py). New engineStats()
+#                   snapshot.maxAge defaults to 1.5 x engine.rate.
+#
 ###################################################################
 
 from Transport  import ProcessClient
 from Transport  import XMLRPCServerMixin
 from Transport  import ConfigComponent
+from Transport.Util import datefunc
 
 import sys
 import commands
@@ -34,6 +47,7 @@ import ConfigParser
 import StringIO
 
 from pdulib import PDU
+from pduengine import PDUEngine
 
 class Stage(ConfigComponent):
 
@@ -116,10 +130,41 @@ class PDUConfig(ConfigComponent):
 
         self.log.info('PDU %s: [%s] %s' % (name,self.model,self.addr))
 
+        self.engine = None
+
+        if self.getboolean('engine',False):
+            rate    = self.getDeltaTime('engine.rate',60)
+            timeout = self.getDeltaTime('engine.timeout',30)
+            wait    = datefunc.timedelta_as_seconds(self.retryWait)
+
+            # Default (None) is based on the rate, see PDUEngine
+
+            if self.get('snapshot.maxAge'):
+                maxAge = self.getDeltaTime('snapshot.maxAge')
+                maxAge = datefunc.timedelta_as_seconds(maxAge)
+            else:
+                maxAge = None
+
+            self.engine = PDUEngine(self.pdu,
+                            rate = datefunc.timedelta_as_seconds(rate),
+                            maxAge = maxAge,
+                            timeout = datefunc.timedelta_as_seconds(timeout),
+                            maxRetries = self.maxRetries,
+                            retryWait = wait,
+                            log = self.log,
+                            isRunning = lambda: self.running)
+            self.engine.start()
+            self.log.info('  - engine mode')
+
     def run(self,cmd,*args):
 
         self.log.debug('%s %s' % (cmd,args))
 
+        if self.engine:
+            if cmd == 'status':
+                return self.engine.getSnapshot()
+            return self.engine.command(cmd,*args)
+
         retryCount = 0
 
         while retryCount <= self.maxRetries and self.running:
@@ -147,6 +192,7 @@ class PDUConfig(ConfigComponent):
                     rails   = rails,
                     model   = self.model,
                     addr    = self.addr,
+                    engine  = self.engine is not None
                     )
 
     def getDevices(self):
@@ -168,15 +214,18 @@ class Server(ProcessClient,XMLRPCServerMixin):
         self.register_function(self.getDeviceState)
         self.register_function(self.getDevices)
         self.register_function(self.setDevice)
+        self.register_function(self.engineStats)
 
         self.cache = self.connect('cache')
 
     def status(self,id,*pos,**kw):
-        pdu = self.pdus[id]
-        results = pdu.run('status')
-        self.cache.put(pdu.name,results)
+        results = self.readStatus(id)
+        self.cache.put(id,results)
         return results
 
+    def readStatus(self,id):
+        return self.pdus[id].run('status')
+
     def getDeviceStateAsConfig(self):
         info   = self.list()
         config = ConfigParser.SafeConfigParser()
@@ -227,13 +276,17 @@ class Server(ProcessClient,XMLRPCServerMixin):
     def getDeviceState(self):
 
         results = {}
+        snapshot = {}
 
         for pdu_name,pdu in self.pdus.items(): 
-            status = self.status(pdu_name)
+            status = self.readStatus(pdu_name)
+            snapshot[pdu_name] = status
             for rail_name,rail in pdu.rails.items(): 
                 state = status['RS'][int(rail_name)-1]
                 results[rail.device] = state
 
+        self.cache.put_many(snapshot)
+
         return results 
 
     def getDeviceStateAsConfig(self):
@@ -256,6 +309,16 @@ class Server(ProcessClient,XMLRPCServerMixin):
         self.log.info('Cmd: %s' % (' '.join(pos)))
         return pdu.run(*pos)
 
+    def engineStats(self):
+
+        results = {}
+
+        for key,pdu in self.pdus.items():
+            if pdu.engine:
+                results[key] = pdu.engine.getStats()
+
+        return results
+
     def list(self):
 
         results = {}
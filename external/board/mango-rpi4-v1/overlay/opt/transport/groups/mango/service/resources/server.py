@@ -25,6 +25,10 @@
 #               Set state to unknown if entry missing 
 #               Add ability to ignore processing 
 #
+#   2026-10-18  Todd Valentic
+#               Reuse service connections (getService) rather than
+#                   connecting on every state change and status poll
+#
 ###########################################################
 
 from Transport      import ProcessClient
@@ -40,6 +44,8 @@ import StringIO
 import commands
 import signal
 
+from rpcclient import ServiceClient
+
 class ResourceState(ConfigComponent):
 
     def __init__(self,name,parent):
@@ -170,7 +176,7 @@ class Resource(ConfigComponent):
         cmd = self.replaceParam(cmd,param).split()
         serviceName,function,args = cmd[0],cmd[1],cmd[2:]
 
-        service = self.parent.connect(serviceName)
+        service = self.parent.getService(serviceName)
         getattr(service,function)(*args)
 
 class ScoreBoard(AccessMixin):
@@ -247,6 +253,7 @@ class ResourceMonitor(ProcessClient, XMLRPCServerMixin):
         self.resources      = self.getComponentsDict('resources',Resource)
         self.statusCommand  = self.get('status.command')
         self.statusService  = self.get('status.service')
+        self.services       = {}
 
         self.scoreboard = ScoreBoard(self,self.resources)
 
@@ -333,9 +340,17 @@ class ResourceMonitor(ProcessClient, XMLRPCServerMixin):
         cmd = cmd.split()
         serviceName,function,args = cmd[0],cmd[1],cmd[2:]
 
-        service = self.connect(serviceName)
+        service = self.getService(serviceName)
         return getattr(service,function)(*args)
 
+    def getService(self,serviceName):
+
+        if serviceName not in self.services:
+            proxy = self.connect(serviceName)
+            self.services[serviceName] = ServiceClient(proxy,serviceName,log=self.log)
+
+        return self.services[serviceName]
+
     def run(self):
         XMLRPCServerMixin.run(self)
         self.allocate('background',self.getList('background.state.stop'))
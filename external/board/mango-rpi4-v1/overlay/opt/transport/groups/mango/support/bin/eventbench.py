@@ -0,0 +1,235 @@
+#!/usr/bin/env python2
+
+###########################################################
+#
+#   Load test for the event delivery
+#
+#   Starts local stand-in observers (fast ones, a slow one
+#   that takes --slow secs per call, a dead port and one
+#   that accepts the connection but never answers), then
+#   sends events at --rate per sec for --secs seconds.
+#
+#   Each event carries the time it was sent, so the fast
+#   observers can record the end-to-end notify latency.
+#   Compares the old single worker thread (new proxy per
+#   event) with the delivery engine.
+#
+#   Usage: eventbench.py [-r rate] [-t secs] [-k keys]
+#
+#   2026-10-18  Todd Valentic
+#       Initial implementation
+#
+###########################################################
+
+import logging
+import optparse
+import os
+import Queue
+import socket
+import sys
+import threading
+import time
+import xmlrpclib
+
+from SimpleXMLRPCServer import SimpleXMLRPCServer,SimpleXMLRPCRequestHandler
+
+sys.path.insert(0,os.path.join(os.path.dirname(__file__),'..','lib'))
+
+from delivery import Delivery
+
+class QuietHandler(SimpleXMLRPCRequestHandler):
+
+    def log_message(self,*args):
+        pass
+
+class StandIn:
+
+    def __init__(self,delay=0):
+
+        self.delay = delay
+        self.latency = []
+        self.lock = threading.Lock()
+
+        self.server = SimpleXMLRPCServer(('127.0.0.1',0),QuietHandler,
+                                         logRequests=False,allow_none=True)
+        self.server.register_function(self.update)
+        self.server.register_multicall_functions()
+
+        self.url = 'http://127.0.0.1:%d' % self.server.server_address[1]
+
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def update(self,key,sent):
+        if self.delay:
+            time.sleep(self.delay)
+        with self.lock:
+            self.latency.append(time.time()-sent)
+        return 1
+
+    def reset(self):
+        with self.lock:
+            self.latency = []
+
+class Hung:
+    """Accepts connections, never answers."""
+
+    def __init__(self):
+        self.sock = socket.socket()
+        self.sock.bind(('127.0.0.1',0))
+        self.sock.listen(64)
+        self.url = 'http://127.0.0.1:%d' % self.sock.getsockname()[1]
+
+def deadURL():
+
+    sock = socket.socket()
+    sock.bind(('127.0.0.1',0))
+    port = sock.getsockname()[1]
+    sock.close()
+
+    return 'http://127.0.0.1:%d' % port
+
+class OldDelivery:
+    """The original worker thread: one queue, new proxy per event."""
+
+    def __init__(self):
+        self.queue = Queue.Queue()
+        self.running = True
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def notify(self,event,signatures,args):
+        for signature in signatures:
+            self.queue.put((event,signature,args))
+
+    def depth(self):
+        return self.queue.qsize()
+
+    def run(self):
+
+        while self.running:
+
+            try:
+                event,signature,args = self.queue.get(timeout=1)
+            except Queue.Empty:
+                continue
+
+            url,method = signature
+
+            try:
+                client = xmlrpclib.ServerProxy(url)
+                getattr(client,method)(*args)
+            except:
+                pass
+
+def percentile(values,p):
+
+    if not values:
+        return float('nan')
+
+    values = sorted(values)
+    index = min(int(len(values)*p/100.0),len(values)-1)
+
+    return values[index]
+
+def run(name,engine,fast,signatures,options):
+
+    for observer in fast:
+        observer.reset()
+
+    engine.start()
+
+    count = int(options.rate*options.secs)
+    start = time.time()
+
+    for k in range(count):
+        target = start+float(k)/options.rate
+        delay = target-time.time()
+        if delay > 0:
+            time.sleep(delay)
+        key = 'key%d' % (k % options.keys)
+        engine.notify(key,signatures,(key,time.time()))
+
+    sendTime = time.time()-start
+
+    # Let the fast observers catch up
+
+    deadline = time.time()+options.drain
+    expected = count*len(fast)
+
+    while time.time() < deadline:
+        received = sum([len(observer.latency) for observer in fast])
+        if received >= expected or engine.depth() == 0:
+            break
+        time.sleep(0.1)
+
+    engine.stop()
+
+    latency = []
+    for observer in fast:
+        latency.extend(observer.latency)
+
+    print '%s:' % name
+    print '  sent %d events in %.1fs, fast observers got %d of %d (left queued %d)' % \
+        (count,sendTime,len(latency),expected,engine.depth())
+    print '  fast latency ms: p50 %.1f  p95 %.1f  max %.1f' % (
+        percentile(latency,50)*1000,percentile(latency,95)*1000,
+        percentile(latency,100)*1000)
+
+if __name__ == '__main__':
+
+    parser = optparse.OptionParser(usage='%prog [options]')
+    parser.add_option('-r','--rate',type='float',default=50)
+    parser.add_option('-t','--secs',type='float',default=5)
+    parser.add_option('-k','--keys',type='int',default=10)
+    parser.add_option('-f','--fast',type='int',default=4)
+    parser.add_option('-s','--slow',type='float',default=0.1)
+    parser.add_option('-w','--workers',type='int',default=4)
+    parser.add_option('--timeout',type='float',default=2)
+    parser.add_option('--drain',type='float',default=10)
+
+    (options,args) = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    socket.setdefaulttimeout(options.timeout)
+
+    fast = [StandIn() for k in range(options.fast)]
+    slow = StandIn(options.slow)
+    hung = Hung()
+    dead = deadURL()
+
+    signatures = [(observer.url,'update') for observer in fast]
+    signatures += [(slow.url,'update'),(hung.url,'update'),(dead,'update')]
+
+    print 'Observers: %d fast, 1 slow (%.1fs), 1 hung, 1 dead' % \
+        (options.fast,options.slow)
+    print '%.0f events/sec over %d keys for %.0fs' % \
+        (options.rate,options.keys,options.secs)
+    print
+
+    run('old worker thread',OldDelivery(),fast,signatures,options)
+
+    engine = Delivery(workers=options.workers,backoffMin=1,backoffMax=5)
+    run('delivery engine',engine,fast,signatures,options)
+
+    print
+    print '%-28s %9s %9s %9s %9s %9s %9s' % \
+        ('observer','delivered','coalesced','dropped','failed','calls','avg ms')
+
+    names = dict([(observer.url,'fast') for observer in fast])
+    names[slow.url] = 'slow'
+    names[hung.url] = 'hung'
+    names[dead] = 'dead'
+
+    for name,stats in sorted(engine.getStats().items()):
+        print '%-28s %9d %9d %9d %9d %9d %9.1f' % (
+            '%s %s' % (names[stats['url']],stats['url'][7:]),
+            stats['delivered'],stats['coalesced'],stats['dropped'],
+            stats['failed'],stats['calls'],stats['avgLatency']*1000)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python2
+
+###########################################################
+#
+#   Benchmark the camera image write path
+#
+#   Writes a synthetic 16-bit frame to disk and compresses
+#   it, comparing the original path (ctypes buffer, one
+#   struct.pack() argument per pixel, whole-file bz2) with
+#   the current one (array.array buffer, in-place byte swap,
+#   streaming compression). Each case runs in a forked
+#   child so that the peak RSS numbers are independent.
+#
+#   Usage: imagebench.py [-W width] [-H height] [-n frames]
+#
+#   2026-10-18  Todd Valentic
+#       Initial implementation
+#
+###########################################################
+
+import array
+import bz2
+import ctypes
+import optparse
+import os
+import random
+import resource
+import struct
+import sys
+import tempfile
+
+sys.path.insert(0,os.path.join(os.path.dirname(__file__),'..','lib'))
+
+from CameraController import write_image_buffer
+import compression
+
+def cpu_time():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+def current_rss():
+    # Resident pages from /proc, in KB
+    pages = int(open('/proc/self/statm').read().split()[1])
+    return pages * resource.getpagesize() / 1024
+
+def make_frame(width,height):
+    # Stand-in for the SDK image buffer: dark frame with noise
+    size = width*height
+    rand = random.Random(0)
+    noise = [rand.randint(800,1200) for k in range(4096)]
+    frame = (ctypes.c_ushort * size)()
+    for k in xrange(size):
+        frame[k] = noise[k & 4095]
+    return frame
+
+def old_path(sdk_buffer,filename):
+
+    image_size = len(sdk_buffer)
+    image_buffer = (ctypes.c_ushort * image_size)()
+    ctypes.memmove(image_buffer,sdk_buffer,image_size*2)
+
+    with open(filename,'wb') as output:
+        output.write(struct.pack('!%dH' % image_size,*image_buffer))
+
+    data = open(filename).read()
+    with open(filename+'.bz2','wb') as output:
+        output.write(bz2.compress(data))
+
+def new_path(sdk_buffer,filename,codec):
+
+    image_size = len(sdk_buffer)
+    image_buffer = array.array('H',[0]) * image_size
+    ctypes.memmove(image_buffer.buffer_info()[0],sdk_buffer,image_size*2)
+
+    with open(filename,'wb') as output:
+        write_image_buffer(output,image_buffer)
+
+    compression.copyFile(filename,filename+compression.extension(codec),codec)
+
+def measure(func,frames,*args):
+    """Run func in a child process, return (cpu secs/frame, peak KB)."""
+
+    rfd,wfd = os.pipe()
+    pid = os.fork()
+
+    if pid == 0:
+        os.close(rfd)
+        baseline = current_rss()
+        start = cpu_time()
+        for k in range(frames):
+            func(*args)
+        elapsed = (cpu_time()-start)/frames
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+        os.write(wfd,'%f %d' % (elapsed,peak))
+        os._exit(0)
+
+    os.close(wfd)
+    result = os.read(rfd,1024)
+    os.close(rfd)
+    os.waitpid(pid,0)
+
+    elapsed,peak = result.split()
+
+    return float(elapsed),int(peak)
+
+if __name__ == '__main__':
+
+    parser = optparse.OptionParser(usage='%prog [options]')
+    parser.add_option('-W','--width',type='int',default=1392)
+    parser.add_option('-H','--height',type='int',default=1040)
+    parser.add_option('-n','--frames',type='int',default=3)
+
+    (options,args) = parser.parse_args()
+
+    frame = make_frame(options.width,options.height)
+    filename = os.path.join(tempfile.mkdtemp(),'image.dat')
+
+    cases = [
+        ('original',      old_path, (frame,filename)),
+        ('stream bz2',    new_path, (frame,filename,'bz2')),
+        ('stream gzip',   new_path, (frame,filename,'gzip'))
+        ]
+
+    print 'Frame: %d x %d (%d bytes), %d frames' % \
+        (options.width,options.height,len(frame)*2,options.frames)
+    print
+    print '%-15s %12s %14s' % ('Path','CPU s/frame','Peak +RSS KB')
+
+    for label,func,args in cases:
+        elapsed,peak = measure(func,options.frames,*args)
+        print '%-15s %12.3f %14d' % (label,elapsed,peak)
+
+    for name in os.listdir(os.path.dirname(filename)):
+        os.remove(os.path.join(os.path.dirname(filename),name))
+    os.rmdir(os.path.dirname(filename))
+
@@ -0,0 +1,151 @@
+#!/usr/bin/env python2
+
+###########################################################
+#
+#   Benchmark PDU access against the simulated PDU
+#
+#   Runs a number of client threads (the resources status
+#   command, camera monitors, ...) against monitor/pdu/sim_pdu.py
+#   for a fixed time, once with a full status read per call
+#   (the way pductl used to work) and once through the
+#   snapshot engine. Each client reads the status and now and
+#   then sets a rail. Reports calls/sec, latency and the
+#   number of commands that reached the PDU.
+#
+#   Usage: pdubench.py [-c clients] [-t secs] [-b baud] [-s sweep]
+#
+#   2026-10-18  Todd Valentic
+#       Initial implementation
+#
+###########################################################
+
+import optparse
+import os
+import random
+import sys
+import threading
+import time
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0,os.path.join(here,'..','lib'))
+sys.path.insert(0,os.path.join(here,'..','..','monitor','pdu'))
+
+from pdulib import PDU
+from pduengine import PDUEngine
+from sim_pdu import SimPDU
+
+class Direct:
+    """Full status read for every call, serialized like the port lock."""
+
+    def __init__(self,addr):
+        self.addr = addr
+        self.lock = threading.Lock()
+
+    def status(self):
+        with self.lock:
+            with PDU(model='v2',addr=self.addr) as pdu:
+                return pdu.status()
+
+    def command(self,*args):
+        with self.lock:
+            with PDU(model='v2',addr=self.addr) as pdu:
+                return pdu.SP(*args)
+
+    def close(self):
+        pass
+
+class Engine:
+
+    def __init__(self,addr,rate):
+        self.engine = PDUEngine(PDU(model='v2',addr=addr),rate=rate)
+        self.engine.start()
+
+    def status(self):
+        return self.engine.getSnapshot()
+
+    def command(self,*args):
+        return self.engine.command('SP',*args)
+
+    def close(self):
+        self.engine.stop()
+
+def client(access,duration,cmdRatio,latencies,errors):
+
+    stop = time.time()+duration
+
+    while time.time() < stop:
+
+        start = time.time()
+
+        try:
+            if random.random() < cmdRatio:
+                access.command(random.randint(1,8),random.choice(['on','off']))
+            else:
+                access.status()
+        except Exception:
+            errors.append(1)
+        else:
+            latencies.append(time.time()-start)
+
+def runCase(label,access,sim,options):
+
+    latencies = []
+    errors = []
+    threads = []
+
+    sim.counts = {}
+
+    for k in range(options.clients):
+        thread = threading.Thread(target=client,args=(access,options.time,
+                                  options.ratio,latencies,errors))
+        thread.start()
+        threads.append(thread)
+
+    for thread in threads:
+        thread.join()
+
+    access.close()
+
+    latencies.sort()
+
+    if latencies:
+        avg = sum(latencies)/len(latencies)*1000
+        p95 = latencies[int(len(latencies)*0.95)]*1000
+        worst = latencies[-1]*1000
+    else:
+        avg = p95 = worst = 0
+
+    print '%-8s %9.1f %9.1f %9.1f %9.1f %8d %8d' % (label,
+        len(latencies)/float(options.time),avg,p95,worst,
+        sim.numCommands(),len(errors))
+
+if __name__ == '__main__':
+
+    parser = optparse.OptionParser(usage='%prog [options]')
+    parser.add_option('-c','--clients',type='int',default=4)
+    parser.add_option('-t','--time',type='float',default=5)
+    parser.add_option('-b','--baud',type='int',default=19200,
+                      help='simulated serial line speed')
+    parser.add_option('-l','--latency',type='float',default=0.005,
+                      help='simulated PDU processing time per command')
+    parser.add_option('-s','--sweep',type='float',default=2,
+                      help='engine sweep rate (secs)')
+    parser.add_option('-r','--ratio',type='float',default=0.1,
+                      help='fraction of calls that are SP commands')
+
+    (options,args) = parser.parse_args()
+
+    sim = SimPDU(port=0,latency=options.latency,baud=options.baud)
+    addr = sim.start()
+
+    print 'Simulated PDU at %s, %d baud, %d clients, %.0f%% SP' % \
+        (addr,options.baud,options.clients,options.ratio*100)
+    print
+    print '%-8s %9s %9s %9s %9s %8s %8s' % \
+        ('Mode','Calls/s','Avg ms','P95 ms','Max ms','PDU cmds','Errors')
+
+    runCase('direct',Direct(addr),sim,options)
+    runCase('engine',Engine(addr,options.sweep),sim,options)
+
+    sim.stop()
+
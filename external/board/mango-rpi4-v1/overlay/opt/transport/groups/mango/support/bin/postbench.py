@@ -0,0 +1,218 @@
+#!/usr/bin/env python2
+
+###########################################################
+#
+#   Benchmark the relay posting scheduler
+#
+#   Starts a local NNTP stand-in server that accepts posts
+#   (optionally limited to a link rate shared by all of the
+#   connections) and posts a mixed workload of many small
+#   housekeeping files and a few large camera files with
+#   different worker counts. Reports files/sec, bytes/sec
+#   and when the last small file made it through.
+#
+#   Usage: postbench.py [-w 1,2,4] [-r rate] [-s small] [-l large]
+#
+#   2026-10-18  Todd Valentic
+#       Initial implementation
+#
+###########################################################
+
+import optparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import nntplib
+import SocketServer
+
+sys.path.insert(0,os.path.join(os.path.dirname(__file__),'..','lib'))
+
+from postqueue import PostScheduler, Throttle
+import compression
+
+class NNTPHandler(SocketServer.StreamRequestHandler):
+
+    def send(self,line):
+        self.wfile.write(line+'\r\n')
+        self.wfile.flush()
+
+    def handle(self):
+
+        link = self.server.link
+
+        self.send('200 stand-in ready')
+
+        while True:
+            line = self.rfile.readline()
+
+            if not line:
+                break
+
+            cmd = line.strip().upper()
+
+            if cmd == 'QUIT':
+                self.send('205 bye')
+                break
+
+            elif cmd == 'POST':
+                self.send('340 send article')
+                while True:
+                    line = self.rfile.readline()
+                    link(len(line))
+                    if not line or line == '.\r\n':
+                        break
+                self.send('240 article posted')
+
+            else:
+                self.send('200 ok')
+
+class NNTPServer(SocketServer.ThreadingTCPServer):
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self,rate):
+        SocketServer.ThreadingTCPServer.__init__(self,('localhost',0),NNTPHandler)
+        self.link = Throttle(rate)
+
+class BenchGroup:
+
+    def __init__(self,name,priority,port,codec):
+        self.name = name
+        self.priority = priority
+        self.port = port
+        self.codec = codec
+        self.news = None
+        self.lastDone = None
+
+    def postFile(self,pathname):
+
+        if not self.news:
+            self.news = nntplib.NNTP('localhost',self.port)
+
+        postfile = pathname
+
+        if self.codec and not compression.isCompressed(pathname):
+            postfile = pathname+compression.extension(self.codec)
+            compression.copyFile(pathname,postfile,self.codec,sync=False)
+
+        size = os.path.getsize(postfile)
+
+        with open(postfile,'rb') as input:
+            header = 'Newsgroups: bench.%s\r\nSubject: %s\r\n\r\n' % \
+                (self.name,os.path.basename(pathname))
+            self.news.post(Article(header,input))
+
+        if postfile != pathname:
+            os.remove(postfile)
+
+        self.lastDone = time.time()
+
+        return size
+
+    def close(self):
+        if self.news:
+            self.news.quit()
+        self.news = None
+
+class Article:
+    """File-like header + body, read a line at a time by nntplib."""
+
+    def __init__(self,header,body):
+        self.lines = header.splitlines(True)
+        self.body = body
+
+    def readline(self):
+        if self.lines:
+            return self.lines.pop(0)
+        return self.body.readline()
+
+def makeFiles(path,prefix,count,size):
+
+    block = os.urandom(size/2).encode('hex')
+    names = []
+
+    for k in range(count):
+        pathname = os.path.join(path,'%s-%04d.dat' % (prefix,k))
+        with open(pathname,'w') as output:
+            for start in range(0,len(block),76):
+                output.write(block[start:start+76]+'\n')
+        names.append(pathname)
+
+    return names
+
+def runCase(workers,port,workload,codec):
+
+    groups = []
+    work = []
+
+    for name,priority,pathnames in workload:
+        group = BenchGroup(name,priority,port,codec)
+        groups.append(group)
+        work.append((group,pathnames))
+
+    scheduler = PostScheduler(workers)
+
+    start = time.time()
+    scheduler.run(work)
+    elapsed = time.time()-start
+
+    smallDone = max([group.lastDone for group in groups if group.name != 'camera'])
+
+    for group in groups:
+        group.close()
+
+    return scheduler,elapsed,smallDone-start
+
+if __name__ == '__main__':
+
+    parser = optparse.OptionParser(usage='%prog [options]')
+    parser.add_option('-w','--workers',default='1,2,4')
+    parser.add_option('-r','--rate',type='int',default=2*1024*1024,
+                      help='link rate in bytes/sec shared by all posts (0=none)')
+    parser.add_option('-s','--small',type='int',default=20,
+                      help='small files per housekeeping group')
+    parser.add_option('-l','--large',type='int',default=2,
+                      help='number of large camera files')
+    parser.add_option('-c','--codec',default='',
+                      help='compress before posting (bz2 or gzip)')
+
+    (options,args) = parser.parse_args()
+
+    server = NNTPServer(options.rate)
+    port = server.server_address[1]
+
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    path = tempfile.mkdtemp()
+
+    # Camera first with the same priority: the worst case for
+    # a single worker since everything queues behind it.
+
+    workload = [
+        ('camera',0,makeFiles(path,'camera',options.large,3*1024*1024)),
+        ('system',0,makeFiles(path,'system',options.small,4*1024)),
+        ('gps',0,makeFiles(path,'gps',options.small,1024)),
+        ('log',0,makeFiles(path,'log',options.small,16*1024))
+        ]
+
+    numFiles = sum([len(files) for name,priority,files in workload])
+
+    print 'Workload: %d files, link rate %s bytes/sec, codec %s' % \
+        (numFiles,options.rate or 'unlimited',options.codec or 'none')
+    print
+    print '%8s %10s %12s %14s' % ('Workers','Files/s','Bytes/s','Small done s')
+
+    for workers in [int(x) for x in options.workers.split(',')]:
+        scheduler,elapsed,smallDone = runCase(workers,port,workload,options.codec)
+        print '%8d %10.1f %12.0f %14.2f' % (workers,
+            scheduler.numFiles/elapsed,scheduler.numBytes/elapsed,smallDone)
+
+    server.shutdown()
+    shutil.rmtree(path)
+
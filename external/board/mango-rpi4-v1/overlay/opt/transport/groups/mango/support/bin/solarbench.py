@@ -0,0 +1,177 @@
+#!/usr/bin/env python2
+
+###########################################################
+#
+#   Benchmark the solar and schedule decisions
+#
+#   Compares decisions/sec for the day/night window check
+#   done the old way (new observer, sun.compute and the
+#   transit searches on every call) against the cached
+#   ephemeris tables, and the schedule match with the
+#   time strings parsed on every call against the
+#   precomputed timeline. Also checks that both ways give
+#   the same answers.
+#
+#   Usage: solarbench.py [-n calls] [-s schedules] [lat lon]
+#
+#   2026-10-18  Todd Valentic
+#       Initial implementation
+#
+###########################################################
+
+import datetime
+import logging
+import optparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import ephem
+
+sys.path.insert(0,os.path.join(os.path.dirname(__file__),'..','lib'))
+
+import ephemeris
+import schedule
+
+# Typical day/night camera schedule
+
+MIN_ANGLE   = -6.0
+WINDOW_MIN  = 2*3600
+
+def inTimeSpan(now,transit,window):
+    return transit-window/2<=now and now<transit+window/2
+
+def oldDecision(lat,lon,t):
+
+    station = ephem.Observer()
+    station.lat = str(lat)
+    station.long = str(lon)
+    station.date = ephemeris.toEphem(t)
+
+    sun = ephem.Sun()
+    sun.compute(station)
+    solarAngle = float(sun.alt)*180/ephem.pi
+
+    nextTransit = ephemeris.toUnix(station.next_transit(sun))
+    station.date = ephemeris.toEphem(t)
+    prevTransit = ephemeris.toUnix(station.previous_transit(sun))
+
+    if inTimeSpan(t,prevTransit,WINDOW_MIN) or inTimeSpan(t,nextTransit,WINDOW_MIN):
+        return True
+
+    if solarAngle < MIN_ANGLE:
+        return False
+
+    return True
+
+def newDecision(cache,lat,lon,t):
+
+    sun = cache.get(lat,lon,t)
+
+    prevTransit = sun.prevTransit(t)
+    nextTransit = sun.nextTransit(t)
+
+    if inTimeSpan(t,prevTransit,WINDOW_MIN) or inTimeSpan(t,nextTransit,WINDOW_MIN):
+        return True
+
+    if not sun.isAbove(MIN_ANGLE,t):
+        return False
+
+    return True
+
+def rate(func,times):
+
+    start = time.time()
+    results = [func(t) for t in times]
+    elapsed = time.time()-start
+
+    return len(times)/elapsed,results
+
+def makeSchedules(count):
+
+    filename = tempfile.mktemp(suffix='.conf')
+
+    with open(filename,'w') as output:
+        for k in range(count):
+            month = random.randint(1,12)
+            day = random.randint(1,28)
+            output.write('[schedule%d]\n' % k)
+            output.write('time.start: %d/%d 00:00\n' % (month,day))
+            output.write('time.span: %dd\n' % random.randint(1,60))
+            output.write('priority: %d\n\n' % random.randint(1,20))
+
+    return filename
+
+if __name__ == '__main__':
+
+    parser = optparse.OptionParser(usage='%prog [options] [lat lon]')
+    parser.add_option('-n','--calls',type='int',default=2000)
+    parser.add_option('-s','--schedules',type='int',default=20)
+
+    (options,args) = parser.parse_args()
+
+    if len(args) == 2:
+        lat,lon = [float(x) for x in args]
+    else:
+        lat,lon = 65.12,-147.47
+
+    random.seed(1)
+    now = time.time()
+
+    # Scheduler ticks spread over the day
+
+    times = [now+random.random()*86400 for k in range(options.calls)]
+
+    print 'Solar window decisions at %.2f,%.2f (%d calls)' % (lat,lon,options.calls)
+
+    oldRate,oldResults = rate(lambda t: oldDecision(lat,lon,t),times)
+
+    cache = ephemeris.Ephemeris()
+    start = time.time()
+    cache.get(lat,lon,now).isAbove(MIN_ANGLE,now)
+    setup = time.time()-start
+
+    newRate,newResults = rate(lambda t: newDecision(cache,lat,lon,t),times)
+
+    differ = sum([a!=b for a,b in zip(oldResults,newResults)])
+
+    print '  old:    %10.0f decisions/sec' % oldRate
+    print '  cached: %10.0f decisions/sec (table setup %.1f ms)' % (newRate,setup*1000)
+    print '  answers differ: %d' % differ
+
+    # Schedule matching
+
+    logging.basicConfig(level=logging.WARNING)
+
+    filename = makeSchedules(options.schedules)
+    manager = schedule.ScheduleManager(logging)
+    manager.load([filename])
+    os.remove(filename)
+
+    utc = schedule.utc
+    year = datetime.datetime.now().year
+    targets = [datetime.datetime(year,1,1,tzinfo=utc)+ \
+               datetime.timedelta(days=random.random()*365)
+               for k in range(options.calls)]
+
+    def oldMatch(t):
+        # Reparse the time strings like every call used to
+        for priority,entry in manager.schedules:
+            entry.spans = {}
+        return manager.matchAll(t)
+
+    print
+    print 'Schedule matches with %d schedules (%d calls)' % \
+        (options.schedules,options.calls)
+
+    oldRate,oldResults = rate(oldMatch,targets)
+    newRate,newResults = rate(manager.match,targets)
+
+    differ = sum([a is not b for a,b in zip(oldResults,newResults)])
+
+    print '  old:      %10.0f matches/sec' % oldRate
+    print '  timeline: %10.0f matches/sec' % newRate
+    print '  answers differ: %d' % differ
+
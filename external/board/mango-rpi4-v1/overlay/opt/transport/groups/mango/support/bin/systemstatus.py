@@ -32,340 +32,70 @@
 #       Add DataTransport section
 #       Add version of this program to [System]
 #
+#   2026-10-18  Todd Valentic
+#       Moved the collection into sysstats.SystemCollector,
+#           which keeps the /proc files open and can be reused
+#           between samples (see SystemMonitor). This script
+#           prints the same INI text as before.
+#       Add --profile to run several cycles and report the
+#           CPU cost of each one.
+#       Fix divide by zero for network rates when sampled
+#           less than a second apart.
+#
 ###########################################################
 
-from datetime import datetime
-
-import calendar
-import ConfigParser
-import commands
-import glob
+import optparse
 import os
 import sys
-import StringIO
-import ConfigParser
-import glob
+import time
+
+sys.path.insert(0,os.path.join(os.path.dirname(__file__),'..','lib'))
 
-VERSION = "1.1.0"
+from sysstats import SystemCollector, toConfig, VERSION
 
 class ResourceMonitor:
 
     def __init__(self,argv):
 
-        self.lasttx = {}
-        self.lastrx = {}
-
-    def updateMounts(self,stats):
-
-        mounts = open('/proc/mounts').read().split('\n')
-        mounts = filter(lambda x: len(x),mounts)
-        mounts = map(lambda x: x.split()[0:4],mounts)
-
-        paths  = []
-
-        for device,path,fstype,access in mounts:
-
-            try:
-                info = os.statvfs(path)
-            except:
-                continue
-
-            if info.f_blocks==0:
-                continue
-
-            if stats.has_section(path):
-                continue
-
-            paths.append(path)
-
-            totalbytes  = info.f_blocks*info.f_bsize
-            freebytes   = info.f_bavail*info.f_bsize
-            reserved    = info.f_bfree*info.f_bsize-freebytes
-            totalavail  = totalbytes-reserved
-            usedbytes   = totalavail-freebytes
-            usedpct     = usedbytes/float(totalavail)*100
-
-            stats.add_section(path)
-            stats.set(path,'device',device)
-            stats.set(path,'fstype',fstype)
-            stats.set(path,'access',access)
-            stats.set(path,'totalbytes',totalavail)
-            stats.set(path,'freebytes',freebytes)
-            stats.set(path,'usedbytes',usedbytes)
-            stats.set(path,'usedpct',usedpct)
-
-        stats.set('System','mounts',' '.join(paths))
-
-    def updateMemory(self,stats):
-
-        lines = open('/proc/meminfo').read().split('\n')
-
-        if 'total:' in lines[0]:     # old style format
-            lines=lines[3:]
-
-        section = 'Memory'
-        stats.add_section(section)
-
-        for line in lines:
-            try:
-                key,value = line.split(':')
-                value = int(value.split()[0])*1024
-                stats.set(section,key,str(value))
-            except:
-                pass
-
-    def updateLoad(self,stats):
-
-        info = open('/proc/loadavg').read().split('\n')
-        load = info[0].split()
-
-        section = 'Load'
-
-        stats.add_section(section)
-        stats.set(section,'1min',load[0])
-        stats.set(section,'5min',load[1])
-        stats.set(section,'15min',load[2])
-
-    def updateSwaps(self,stats):
-
-        section = 'Swaps'
-        stats.add_section(section)
-
-        info = open('/proc/swaps').read().split('\n')
-
-        swaps = []
-
-        for line in info[1:-1]:
-            try:
-                dev,type,size,used,priority = line.split()
-            except:
-                continue
-            swaps.append(dev)
-            stats.set(section,dev+'.type',type)
-            stats.set(section,dev+'.size',str(int(size)*1024))
-            stats.set(section,dev+'.used',str(int(used)*1024))
-            stats.set(section,dev+'.priority',priority)
-
-        stats.set(section,'mounts',' '.join(swaps))
-
-    def updateUptime(self,stats):
-
-        info = open('/proc/uptime').read().split('\n')
-        secs = float(info[0].split()[0])
-
-        section = 'Uptime'
-        stats.add_section(section)
-        stats.set(section,'seconds',secs)
-
-    def computeRate(self,prevbytes,prevtime,curbytes,curtime):
-        if prevbytes>curbytes:
-            # Counter rollover
-            deltabytes = 2**32-prevbytes + curbytes
-        else:
-            deltabytes = curbytes-prevbytes
-        return deltabytes/(curtime-prevtime).seconds
-
-    def updateNetwork(self,stats):
-
-        info = open('/proc/net/dev').read().split('\n')[2:-1]
-
-        section = 'Network'
-        stats.add_section(section)
-
-        devs = []
-        now  = datetime.now()
-
-        for device in info:
-
-            name,data   = device.split(':')
-            name        = name.strip()
-            data        = data.split()
-
-            macaddr = open('/sys/class/net/%s/address' % name).read().strip()
-
-            if self.lasttx.has_key(name):
-                txbytes,txtime = self.lasttx[name]
-                rxbytes,rxtime = self.lastrx[name]
-                txrate = self.computeRate(txbytes,txtime,float(data[8]),now)
-                rxrate = self.computeRate(rxbytes,rxtime,float(data[0]),now)
-            else:
-                txrate = 0
-                rxrate = 0
+        self.collector = SystemCollector()
 
-            stats.set(section,name+'.macaddr',macaddr)
-            stats.set(section,name+'.rx.rate',rxrate)
-            stats.set(section,name+'.rx.bytes',data[0])
-            stats.set(section,name+'.rx.packets',data[1])
-            stats.set(section,name+'.rx.errs',data[2])
-            stats.set(section,name+'.rx.drop',data[3])
-
-            stats.set(section,name+'.tx.rate',txrate)
-            stats.set(section,name+'.tx.bytes',data[8])
-            stats.set(section,name+'.tx.packets',data[9])
-            stats.set(section,name+'.tx.errs',data[10])
-            stats.set(section,name+'.tx.drop',data[11])
-
-            self.lasttx[name] = (float(data[8]),now)
-            self.lastrx[name] = (float(data[0]),now)
-
-            devs.append(name)
-
-        stats.set(section,'devices',' '.join(devs))
-
-    def updateTemps(self, stats):
-
-        zones = glob.glob('/sys/class/thermal/thermal_zone*')
-        
-        section = 'Temperature'
-        stats.add_section(section)
-
-        for zone in sorted(zones):
-            temp_c = open(os.path.join(zone,'temp')).read().strip()
-            temp_c = float(temp_c)/1000
-            stats.set(section, os.path.basename(zone), temp_c) 
-
-    def updateDataTransport(self, stats):
-
-        section = "DataTransport"
-        transport_dir = "/opt/transport"
-
-        cmd = "grep version %s/etc/transportd.conf" % transport_dir
-        status, output = commands.getstatusoutput(cmd)
-
-        stats.add_section(section)
-
-        if status == 0:
-            key, value = [v.strip() for v in output.split(":")]
-            stats.set(section, key, value)
-
-        for filename in glob.glob("%s/groups/**/release.conf" % transport_dir):
-            group = filename.replace(transport_dir+"/groups", "")
-            group = group.replace("release.conf", "")[1:-1]
-            config = ConfigParser.ConfigParser()
-            config.read(filename)
-
-            for key, value in config.defaults().items():
-                stats.set(section, "%s.%s" % (group, key), value)
-
-    def updateFirmwareVersion(self, stats):
- 
-        cmd = "sudo /usr/bin/vcgencmd version"
-        status, output = commands.getstatusoutput(cmd)
-
-        if status != 0:
-            return
-
-        lines = output.split("\n")
-        info = {} 
-
-        for line in lines: 
-            line = line.strip()
-            try:
-                key, value = line.split()[:2]
-            except:
-                continue
-
-            info[key] = value
-
-        try:
-            fmt = "%b %d %Y %H:%M:%S"
-            tmtuple = datetime.strptime(lines[0].strip(), fmt).timetuple()
-            info["date"] = calendar.timegm(tmtuple)
-        except:
-            info["date"] = "" 
-
-        section = "Board"
-
-        if not stats.has_section(section):
-            stats.add_section(section)
-
-        stats.set(section, "firmware.version", info.get("version", ""))
-        stats.set(section, "firmware.date", info.get("date", ""))
-
-    def updateBootloaderVersion(self, stats):
-
-        cmd = "sudo /usr/bin/vcgencmd bootloader_version"
-        status, output = commands.getstatusoutput(cmd)
-
-        if status != 0:
-            return
-
-        info = {} 
-
-        for line in output.split("\n"):
-            try:
-                key, value = line.split()[:2]
-            except:
-                continue
-
-            info[key] = value
-
-        section = "Board"
-
-        if not stats.has_section(section):
-            stats.add_section(section)
-
-        stats.set(section, "bootloader.version", info.get("version", ""))
-        stats.set(section, "bootloader.timestamp", info.get("timestamp", ""))
-        stats.set(section, "bootloader.update-time", info.get("update-time", ""))
-        stats.set(section, "bootloader.capabilities", info.get("capabilities", ""))
-
-    def updateBoardInfo(self, stats):
-
-        info = {}
-
-        for line in open('/proc/cpuinfo').read().split('\n'):
-            line = line.strip()
-            if not line:
-                continue
-
-            try:
-                key, value = line.split(":")
-                key = key.strip()
-            except:
-                continue
-
-            info[key] = value
-
-        section = "Board"
-
-        if not stats.has_section(section):
-            stats.add_section(section)
+    def status(self):
+        return toConfig(self.collector.update())
 
-        stats.set(section, "hardware", info.get("Hardware", ""))
-        stats.set(section, "revision", info.get("Revision", ""))
-        stats.set(section, "serial", info.get("Serial", ""))
-        stats.set(section, "model", info.get("Model", ""))
+def profile(count,rate):
 
-    def status(self):
+    collector = SystemCollector(profile=True)
 
-        timestamp = datetime.now()
+    for cycle in range(count):
 
-        stats = ConfigParser.ConfigParser()
-        stats.add_section('System')
-        stats.set('System','timestamp',str(timestamp))
-        stats.set("System", "version", VERSION)
+        if cycle:
+            time.sleep(rate)
 
-        self.updateMounts(stats)
-        self.updateMemory(stats)
-        self.updateLoad(stats)
-        self.updateUptime(stats)
-        self.updateNetwork(stats)
-        self.updateSwaps(stats)
-        self.updateTemps(stats)
-        self.updateDataTransport(stats)
-        self.updateBoardInfo(stats)
+        info = collector.update()['collector']
 
-        if os.path.exists("/usr/bin/vcgencmd"):
-            self.updateBootloaderVersion(stats)
-            self.updateFirmwareVersion(stats)
+        sections = ' '.join(['%s %.2f' % (name,secs*1000) for name,secs in
+                             sorted(info['sections'].items())])
 
-        buffer = StringIO.StringIO()
-        stats.write(buffer)
+        print 'cycle %3d: cpu %6.2f ms  wall %6.2f ms  (%s)' % \
+            (info['cycles'],info['cpu']*1000,info['wall']*1000,sections)
 
-        return buffer.getvalue()
+    print 'average cpu per cycle: %.2f ms (first cycle includes static info)' % \
+        (info['avgcpu']*1000)
 
 if __name__ == '__main__':
-   monitor = ResourceMonitor(sys.argv)
-   print(monitor.status())
 
+    parser = optparse.OptionParser(usage='%prog [options]',version=VERSION)
+    parser.add_option('-p','--profile',action='store_true',
+                      help='Report the CPU time per cycle')
+    parser.add_option('-n','--count',type='int',default=10,
+                      help='Number of profile cycles (default 10)')
+    parser.add_option('-r','--rate',type='float',default=1,
+                      help='Secs between profile cycles (default 1)')
+
+    (options,args) = parser.parse_args()
+
+    if options.profile:
+        profile(options.count,options.rate)
+    else:
+        monitor = ResourceMonitor(sys.argv)
+        print(monitor.status())
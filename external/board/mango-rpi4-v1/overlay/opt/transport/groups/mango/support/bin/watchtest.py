@@ -0,0 +1,240 @@
+#!/usr/bin/env python2
+
+###########################################################
+#
+#   Exercise the relay watch mode against a temp directory
+#
+#   A writer drops files into a temporary outbound tree
+#   (written in place, written as a dot file and renamed,
+#   and into a subdirectory created while running). A
+#   stand-in poster blocks on the watcher like postfiles.py
+#   does, "posts" each new file and marks it done. Most of
+#   the posted files are then deleted, so the index log gets
+#   both adds and removes.
+#
+#   Checks that:
+#
+#       - every matching file is posted exactly once
+#       - dot files and non-matching names are not posted
+#       - after a restart only the files written while
+#         stopped are reported
+#       - the index log is compacted and stays bounded
+#
+#   and reports the close to post latency.
+#
+#   Usage: watchtest.py [-n files] [-i interval]
+#
+#   2026-10-18  Todd Valentic
+#       Initial implementation
+#
+###########################################################
+
+import collections
+import logging
+import optparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0,os.path.join(os.path.dirname(__file__),'..','lib'))
+
+from filewatch import FileWatcher, waitAny
+
+class StandInPoster:
+
+    def __init__(self,watcher,delay=0):
+
+        self.watcher = watcher
+        self.delay = delay
+        self.running = True
+        self.posted = collections.defaultdict(list)
+        self.lock = threading.Lock()
+
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+
+    def run(self):
+
+        while self.running:
+
+            waitAny([self.watcher],60,lambda: self.running)
+
+            for pathname in self.watcher.poll():
+                if self.delay:
+                    time.sleep(self.delay)
+                with self.lock:
+                    self.posted[pathname].append(time.time())
+                self.watcher.markDone(pathname)
+                if 'keep' not in os.path.basename(pathname):
+                    os.remove(pathname)
+
+    def count(self):
+        with self.lock:
+            return sum([len(times) for times in self.posted.values()])
+
+def writeFile(pathname,size=1024,hidden=False):
+
+    if hidden:
+        path,filename = os.path.split(pathname)
+        tmpname = os.path.join(path,'.'+filename)
+        with open(tmpname,'w') as output:
+            output.write('x'*size)
+        os.rename(tmpname,pathname)
+    else:
+        with open(pathname,'w') as output:
+            output.write('x'*size)
+
+    return time.time()
+
+def check(label,ok):
+    print '  %-48s %s' % (label,ok and 'ok' or 'FAILED')
+    return ok
+
+def percentile(values,p):
+
+    if not values:
+        return float('nan')
+
+    values = sorted(values)
+    index = min(int(len(values)*p/100.0),len(values)-1)
+
+    return values[index]
+
+if __name__ == '__main__':
+
+    parser = optparse.OptionParser(usage='%prog [options]')
+    parser.add_option('-n','--files',type='int',default=200)
+    parser.add_option('-i','--interval',type='float',default=0.01)
+    parser.add_option('--maxlines',type='int',default=50)
+    parser.add_option('-k','--keep',action='store_true',
+                      help='Keep the temp directory')
+
+    (options,args) = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    top = tempfile.mkdtemp(prefix='watchtest-')
+    outbound = os.path.join(top,'outbound')
+    indexFile = os.path.join(top,'test.index')
+
+    os.makedirs(os.path.join(outbound,'a'))
+
+    print 'Watching %s' % outbound
+
+    watcher = FileWatcher(outbound,indexFile,matchNames=['*.dat'],
+                          maxLines=options.maxlines)
+    watcher.start()
+
+    poster = StandInPoster(watcher)
+    poster.start()
+
+    written = {}
+    ignored = []
+
+    for k in range(options.files):
+
+        if k == options.files/2:
+            os.makedirs(os.path.join(outbound,'b','c'))
+
+        if k >= options.files/2:
+            path = os.path.join(outbound,'b','c')
+        else:
+            path = os.path.join(outbound,'a')
+
+        if k % 3 == 0:
+            pathname = os.path.join(path,'keep-%05d.dat' % k)
+        else:
+            pathname = os.path.join(path,'data-%05d.dat' % k)
+        written[pathname] = writeFile(pathname,hidden=k%2)
+
+        if k % 10 == 0:
+            other = os.path.join(path,'notes-%05d.txt' % k)
+            writeFile(other)
+            ignored.append(other)
+
+        time.sleep(options.interval)
+
+    deadline = time.time()+10
+
+    while poster.count() < len(written) and time.time() < deadline:
+        time.sleep(0.05)
+
+    time.sleep(0.5)     # give any duplicates a chance to show up
+    poster.stop()
+    watcher.stop()
+
+    compactions = watcher.index.compactions
+
+    posted = dict(poster.posted)
+    latency = [posted[pathname][0]-written[pathname]
+               for pathname in written if pathname in posted]
+
+    print
+    print 'Live: %d files written, %d posted' % (len(written),len(posted))
+    print '  latency ms: p50 %.1f  p95 %.1f  max %.1f' % (
+        percentile(latency,50)*1000,percentile(latency,95)*1000,
+        percentile(latency,100)*1000)
+    print
+
+    results = []
+    results.append(check('every file posted',set(written) == set(posted)))
+    results.append(check('no file posted twice',
+        all([len(times) == 1 for times in posted.values()])))
+    results.append(check('non-matching names skipped',
+        not set(ignored).intersection(posted)))
+    results.append(check('dot files skipped',
+        not [p for p in posted if os.path.basename(p).startswith('.')]))
+
+    # Restart with files written while stopped
+
+    offline = []
+    for k in range(3):
+        pathname = os.path.join(outbound,'a','late-keep-%d.dat' % k)
+        writeFile(pathname)
+        offline.append(pathname)
+
+    watcher = FileWatcher(outbound,indexFile,matchNames=['*.dat'],
+                          maxLines=options.maxlines)
+    watcher.start()
+
+    found = watcher.poll()
+
+    results.append(check('restart reports only new files',
+        sorted(found) == sorted(offline)))
+
+    for pathname in found:
+        watcher.markDone(pathname)
+
+    lines = len(open(indexFile).readlines())
+    entries = len(watcher.index.entries)
+
+    watcher.stop()
+
+    results.append(check('index compacted (%d times)' % compactions,
+        compactions > 1))
+    results.append(check('index log bounded (%d lines, %d entries)' % \
+        (lines,entries),lines <= max(options.maxlines,2*entries)))
+
+    if options.keep:
+        print
+        print 'Kept %s' % top
+    else:
+        shutil.rmtree(top)
+
+    print
+
+    if all(results):
+        print 'All checks passed'
+    else:
+        print 'Some checks FAILED'
+        sys.exit(1)
@@ -14,8 +14,15 @@
 #               Streamline image capture - match SDK example program
 #               Add log parameter, log capture steps
 #
+#   2026-10-18  Todd Valentic
+#               Copy the SDK image buffer directly into an array.array
+#                   and add write_image_buffer() to write it out in
+#                   network byte order without building a python
+#                   argument tuple for every pixel.
+#
 ###########################################################################
 
+import array
 import ctypes
 import sys
 import datetime
@@ -53,6 +60,32 @@ ErrorCatalog= {
 class CameraError(Exception):
     pass
 
+def write_image_buffer(output, image_buffer):
+    """Write 16-bit pixels to a file in network (big-endian) order.
+
+       The buffer is byte swapped in place on little-endian hosts,
+       written through the buffer interface and then swapped back,
+       so no intermediate copies of the image are made. Buffers that
+       are not an array.array (i.e. a ctypes array) are first copied
+       into one.
+    """
+
+    if isinstance(image_buffer, array.array):
+        pixels = image_buffer
+    else:
+        pixels = array.array('H')
+        pixels.fromstring(buffer(image_buffer))
+
+    if sys.byteorder == 'big':
+        output.write(pixels)
+        return
+
+    pixels.byteswap()
+    try:
+        output.write(pixels)
+    finally:
+        pixels.byteswap()
+
 class CameraDevice:
 
     def __init__(self, controller, device, config=None, log=None):
@@ -383,11 +416,12 @@ class CameraDevice:
             raise RuntimeError('Problem accessing the image buffer')
 
         image_size = w.value * h.value
-        image_buffer = (ctypes.c_ushort * image_size)()
+        image_buffer = array.array('H', [0]) * image_size
         bytes_per_pixel = 2   # Atik series 3 and 4 pad ADC to 16-bits
 
         image_bytes = image_size * bytes_per_pixel
-        ctypes.memmove(image_buffer, image_pointer, image_bytes)
+        address = image_buffer.buffer_info()[0]
+        ctypes.memmove(address, image_pointer, image_bytes)
 
         image_data = DotDict(dict(
             x = x.value,
@@ -511,8 +545,6 @@ class CameraController:
 
 if __name__ == '__main__':
 
-    import struct
-
     if len(sys.argv)==2:
         exposure_time = float(sys.argv[1])
     else:
@@ -561,7 +593,7 @@ if __name__ == '__main__':
         print('  - buffer: %s' % type(image_data.image_buffer))
 
         with open('/tmp/tmp.dat','w') as output:
-            output.write(struct.pack('!%dH' % image_data.image_size, *image_data.image_buffer))
+            write_image_buffer(output, image_data.image_buffer)
 
         print('Warm up camera')
         camera.warmup()
@@ -99,6 +99,25 @@
 #   2022-05-02  Todd Valentic
 #               Add sampleTime get/set 
 #
+#   2026-10-18  Todd Valentic
+#               Stream compression in compressFile() using the
+#                   compression module rather than reading the whole
+#                   file into memory. Add output.compress.codec and
+#                   output.compress.level parameters.
+#
+#               Connect to services through rpcclient.ServiceClient
+#                   (connectService). The status call is memoized for
+#                   rpc.ttl secs and cleared when we allocate resources.
+#                   Log per-method RPC stats every rpc.stats.rate.
+#                   getStatus() only takes positional args (XML-RPC
+#                   has no keyword args).
+#
+#               Only check the schedule files for changes every
+#                   schedule.check.rate (default 60 secs).
+#               Add cachedDecision() so derived classes can reuse a
+#                   window decision until the time it next changes
+#                   (at most decision.hold, default 5 minutes).
+#
 ##################################################################
 
 from Transport import ProcessClient
@@ -113,13 +132,14 @@ import stat
 import time
 import struct
 import glob
-import bz2
 import sys
 import StringIO
 import ConfigParser
 import datetime
 
 import schedule
+import compression
+import rpcclient
 from ResourceMixin import ResourceMixin
 
 class DataMonitorMixin(DirectoryMixin,ResourceMixin):
@@ -131,9 +151,23 @@ class DataMonitorMixin(DirectoryMixin,ResourceMixin):
         statusServiceName   = self.get('status.service','sbcctl') 
         self.statusMethod   = self.get('status.method','status') 
 
-        self.statusService  = self.connect(statusServiceName)
-        self.cacheService   = self.connect('cache')
-        self.schedules      = schedule.ScheduleManager(self.log)
+        self.rpcClients     = []
+        self.rpcTTL         = self.getDeltaTime('rpc.ttl',5)
+        self.rpcTTL         = datefunc.timedelta_as_seconds(self.rpcTTL)
+        self.rpcStatsRate   = self.getDeltaTime('rpc.stats.rate')
+        self.rpcStatsTime   = None
+
+        self.statusService  = self.connectService(statusServiceName,
+                                {self.statusMethod: self.rpcTTL})
+        self.cacheService   = self.connectService('cache')
+        self.statusText     = None
+        self.statusConfig   = None
+        self.scheduleCheck  = self.getDeltaTime('schedule.check.rate',60)
+        self.scheduleCheck  = datefunc.timedelta_as_seconds(self.scheduleCheck)
+        self.schedules      = schedule.ScheduleManager(self.log,self.scheduleCheck)
+        self.decisionHold   = self.getDeltaTime('decision.hold',5*60)
+        self.decisionHold   = datefunc.timedelta_as_seconds(self.decisionHold)
+        self.decisions      = {}
         self.curSchedule    = None
         self.on             = False
         self._sampleTime    = None
@@ -143,6 +177,8 @@ class DataMonitorMixin(DirectoryMixin,ResourceMixin):
         self.outputpath     = self.get('output.path','')
         self.outputname     = self.get('output.name','data-%Y%m%d-%H%M%S.dat')
         self.compress       = self.getboolean('output.compress',True)
+        self.compressCodec  = self.get('output.compress.codec','bz2')
+        self.compressLevel  = self.getint('output.compress.level')
         self.scriptPath     = self.get('scripts')
         self.scheduleRate   = self.getDeltaTime('schedule.rate',60)
         self.scheduleFiles  = self.getList('schedule.files')
@@ -154,14 +190,46 @@ class DataMonitorMixin(DirectoryMixin,ResourceMixin):
 
         self.schedules.reload(self.scheduleFiles)
 
-    def getStatus(self,*pos,**kw):
+    def connectService(self,name,ttl=None):
+        client = rpcclient.ServiceClient(self.connect(name),name,ttl,self.log)
+        self.rpcClients.append(client)
+        return client
+
+    def logServiceStats(self):
+
+        if not self.rpcStatsRate:
+            return
+
+        now = self.currentTime()
+
+        if self.rpcStatsTime and now < self.rpcStatsTime:
+            return
+
+        for client in self.rpcClients:
+            client.logStats()
+
+        self.rpcStatsTime = now + self.rpcStatsRate
+
+    def allocate(self):
+        ResourceMixin.allocate(self)
+        self.statusService.invalidate()
+
+    def getStatus(self,*pos):
 
         status = ConfigParser.ConfigParser()
 
         try:
             func = getattr(self.statusService,self.statusMethod)
-            buffer = StringIO.StringIO(func(*pos,**kw))
-            status.readfp(buffer)
+            text = func(*pos)
+
+            # Memoized calls return the same text, don't reparse it 
+
+            if text is self.statusText:
+                return self.statusConfig
+
+            status.readfp(StringIO.StringIO(text))
+            self.statusText = text
+            self.statusConfig = status
         except:
             self.log.exception('Failed to get status')
 
@@ -295,6 +363,30 @@ class DataMonitorMixin(DirectoryMixin,ResourceMixin):
         # Derived classes extend this for more interesting logic.
         return self.curSchedule.inWindow()
 
+    def cachedDecision(self,name,func):
+        # func() returns (value,until) where until is the unix time
+        # the value could next change (None to check every time).
+        # The value is kept for the current schedule until then.
+
+        now = time.time()
+        entry = self.decisions.get(name)
+
+        if entry:
+            curSchedule,until,value = entry
+            if curSchedule is self.curSchedule and now<until:
+                return value
+
+        value,until = func()
+
+        if until is None:
+            until = 0
+        else:
+            until = min(until,now+self.decisionHold)
+
+        self.decisions[name] = (self.curSchedule,until,value)
+
+        return value
+
     def scheduler(self):
 
         self.nextSampleTime = None
@@ -303,8 +395,11 @@ class DataMonitorMixin(DirectoryMixin,ResourceMixin):
 
             yield True
 
+            self.logServiceStats()
+
             if self.schedules.reload(self.scheduleFiles):
                 self.nextSampleTime=None
+                self.decisions = {}
 
             self.curSchedule = self.schedules.match(self.currentTime())
 
@@ -417,28 +512,25 @@ class DataMonitorMixin(DirectoryMixin,ResourceMixin):
             files = files[:-1]
 
         for filename in files:
-            data = open(filename).read()
             outputname = os.path.join(self.outputpath,filename)
 
             if self.compress:
-                zdata = bz2.compress(data)
-                outputname += '.bz2'
+                codec = self.compressCodec
+                outputname += compression.extension(codec)
                 action = 'compressing'
             else:
-                zdata = data
+                codec = None
                 action = 'copying'
 
             dirname = os.path.dirname(outputname)
             if not os.path.exists(dirname):
                 os.makedirs(dirname)
 
-            with open(outputname,'wb') as output:
-                output.write(zdata)
-                output.flush()
-                os.fsync(output.fileno())
+            insize,outsize = compression.copyFile(filename,outputname,
+                                                  codec,self.compressLevel)
 
             self.log.info('%s %s: %d -> %d' % \
-                (action,filename,len(data),len(zdata)))
+                (action,filename,insize,outsize))
             os.remove(filename)
 
 class DataMonitorComponent(ConfigComponent,DataMonitorMixin):
@@ -19,6 +19,12 @@
 #               Base window selection on rising/setting times
 #               Add warmup time parameter
 #
+#   2026-10-18  Todd Valentic
+#               Memoize location.best() for rpc.ttl secs
+#
+#               Use the shared solar ephemeris tables and keep the
+#                   decision until it next changes.
+#
 #####################################################################
 
 from DataMonitor import DataMonitorMixin
@@ -26,8 +32,10 @@ from Transport   import ProcessClient
 from Transport   import ConfigComponent
 
 import sys
-import pytz
-import ephem
+import time
+import ephemeris
+
+from Transport.Util import datefunc
 
 class NightDataMonitorMixin(DataMonitorMixin):
 
@@ -35,9 +43,13 @@ class NightDataMonitorMixin(DataMonitorMixin):
         DataMonitorMixin.__init__(self)
 
         self.reportMissingLocation = True
-        self.location = self.connect('location')
+        self.location = self.connectService('location',{'best': self.rpcTTL})
+        self.ephemeris = ephemeris.shared()
 
     def checkWindow(self):
+        return self.cachedDecision('window',self.checkWindowNow)
+
+    def checkWindowNow(self):
 
         schedule = self.curSchedule
         location = self.location.best()
@@ -47,37 +59,31 @@ class NightDataMonitorMixin(DataMonitorMixin):
             if self.reportMissingLocation:
                 self.reportMissingLocation=False
                 self.log.info('No location data.')
-            return False
+            return False,None
         else:
             # We got a good position, reset flag
             self.reportMissingLocation=True
 
         if schedule.minSolarAngle is None:
             # Nothing to do
-            return False
+            return False,None
 
         offset_time = schedule.getDeltaTime('start.offset')
 
-        sun = ephem.Sun()
+        now = time.time()
+        sun = self.ephemeris.get(location['latitude'],location['longitude'],now)
 
-        station = ephem.Observer()
-        station.lat = str(location['latitude'])
-        station.lon = str(location['longitude'])
-        station.date = ephem.now() 
-        station.horizon = str(schedule.minSolarAngle)
+        # The state flips when the sun crosses the min angle
 
-        self.log.debug('Station: %s' % station)
+        nextCrossing = sun.nextCrossing(schedule.minSolarAngle,now)
 
         # If the sun is already set, then turn on
 
-        sun.compute(station)
-        solarAngle = float(sun.alt)*180/ephem.pi
+        self.log.debug('Checking solar angle: %s' % schedule.minSolarAngle)
 
-        self.log.debug('Checking solar angle: %s' % solarAngle)
-
-        if solarAngle <= schedule.minSolarAngle:
+        if not sun.isAbove(schedule.minSolarAngle,now):
             self.log.debug('  - sun is below min elevation. Turn on')
-            return True 
+            return True,nextCrossing
 
         # If we are approaching sunset, check the offset time
 
@@ -85,25 +91,25 @@ class NightDataMonitorMixin(DataMonitorMixin):
 
             self.log.debug('Checking sunset time with offset %s' % offset_time)
 
-            try:
-                next_setting = station.next_setting(sun, use_center=True)
-                self.log.debug('  next setting at %s' % next_setting)
-            except ephem.AlwaysUpError:
+            next_setting = sun.nextCrossing(schedule.minSolarAngle,now,rising=False)
+
+            if next_setting is None:
                 self.log.debug('  sun is always up. Turn off.')
-                return False
-            except ephem.NeverUpError:
-                self.log.debug('  sun is never up. Turn on.')
-                return True
+                return False,None
 
-            next_setting = next_setting.datetime().replace(tzinfo=pytz.utc)
+            self.log.debug('  next setting at %s' % ephemeris.toEphem(next_setting))
 
-            if self.currentTime() >= (next_setting - offset_time):
+            start_time = next_setting - datefunc.timedelta_as_seconds(offset_time)
+
+            if now >= start_time:
                 self.log.debug('  in pre-sunset time window. Turn on') 
-                return True
+                return True,next_setting
+
+            nextCrossing = start_time
 
         self.log.debug('Sun is above min elevation - turn off')
 
-        return False
+        return False,nextCrossing
 
 class NightDataMonitorComponent(ConfigComponent,NightDataMonitorMixin):
 
@@ -36,6 +36,12 @@
 #   2021-06-30  Todd Valentic
 #               Use location service
 #
+#   2026-10-18  Todd Valentic
+#               Memoize location.best() for rpc.ttl secs
+#
+#               Use the shared solar ephemeris tables and keep the
+#                   decision until it next changes.
+#
 ###########################################################
 
 from DataMonitor import DataMonitorMixin
@@ -43,29 +49,37 @@ from Transport   import ProcessClient
 from Transport   import ConfigComponent
 
 import sys
-import ephem
+import time
+import ephemeris
+
+from Transport.Util import datefunc
 
 class SolarDataMonitorMixin(DataMonitorMixin):
 
     def __init__(self):
         DataMonitorMixin.__init__(self)
 
-        self.location = self.connect('location')
+        self.location = self.connectService('location',{'best': self.rpcTTL})
+        self.ephemeris = ephemeris.shared()
         self.reportMissingGPS = True
 
     def inTimeSpan(self,now,transit,window,repeatDays):
 
-        now = now.datetime()
+        # Unix times
 
-        transitTime = transit.datetime()
-        dayOfYear = int(transitTime.strftime('%j'))
+        dayOfYear = time.gmtime(transit).tm_yday
 
         if repeatDays and dayOfYear%repeatDays!=0:
             return False
 
-        return transitTime-window/2<=now and now<transitTime+window/2
+        halfWindow = datefunc.timedelta_as_seconds(window)/2
+
+        return transit-halfWindow<=now and now<transit+halfWindow
 
     def checkWindow(self):
+        return self.cachedDecision('window',self.checkWindowNow)
+
+    def checkWindowNow(self):
 
         location = self.location.best()
 
@@ -73,72 +87,75 @@ class SolarDataMonitorMixin(DataMonitorMixin):
             if self.reportMissingGPS:
                 self.reportMissingGPS=False
                 self.log.info('No GPS or Iridium position data...')
-            return False
+            return False,None
 
         self.reportMissingGPS=True
 
-        now = ephem.now()
+        now = time.time()
+        sun = self.ephemeris.get(location['latitude'],location['longitude'],now)
+
+        prevTransit = sun.prevTransit(now)
+        nextTransit = sun.nextTransit(now)
 
-        station = ephem.Observer()
-        station.lat = str(location['latitude'])
-        station.long = str(location['longitude'])
-        station.date = now
+        self.log.debug('  prev transit: %s' % ephemeris.toEphem(prevTransit))
+        self.log.debug('  next transit: %s' % ephemeris.toEphem(nextTransit))
 
-        self.log.debug('station: %s' % station)
+        schedule = self.curSchedule
 
-        sun = ephem.Sun()
-        sun.compute(station)
-        solarAngle = float(sun.alt)*180/ephem.pi
+        # The answer can only change at one of these times
 
-        station.date = now
-        nextTransit = station.next_transit(sun)
+        changes = [nextTransit]
 
-        station.date = now
-        prevTransit = station.previous_transit(sun)
+        for window in [schedule.windowMin,schedule.windowMax]:
+            if window is not None:
+                halfWindow = datefunc.timedelta_as_seconds(window)/2
+                for transit in [prevTransit,nextTransit]:
+                    changes.extend([transit-halfWindow,transit+halfWindow])
 
-        self.log.debug('  prev transit: %s' % prevTransit)
-        self.log.debug('  next transit: %s' % nextTransit)
-        self.log.debug('  sun angle: %s' % solarAngle)
+        for angle in [schedule.minSolarAngle,schedule.maxSolarAngle]:
+            if angle is not None:
+                changes.append(sun.nextCrossing(angle,now))
 
-        schedule = self.curSchedule
+        changes = [t for t in changes if t is not None and t>now]
+        until = changes and min(changes) or None
 
         self.log.debug('  checking if in prev min')
         if self.inTimeSpan(now,prevTransit,schedule.windowMin,schedule.repeatDays):
             self.log.debug('    yes - turn on')
-            return True
+            return True,until
 
         self.log.debug('  checking if in next min')
         if self.inTimeSpan(now,nextTransit,schedule.windowMin,schedule.repeatDays):
             self.log.debug('    yes - turn on')
-            return True
+            return True,until
 
         if schedule.minSolarAngle is not None:
             self.log.debug('  checking solar angle')
-            if solarAngle < schedule.minSolarAngle:
+            if not sun.isAbove(schedule.minSolarAngle,now):
                 self.log.debug('    sun too low - turn off')
-                return False
+                return False,until
 
         if schedule.maxSolarAngle is not None:
-            if solarAngle >= schedule.maxSolarAngle:
+            if sun.isAbove(schedule.maxSolarAngle,now):
                 self.log.debug('    sun too high - turn off')
-                return False
+                return False,until
 
         if schedule.windowMax is None:
-            return True
+            return True,until
 
         self.log.debug('  checking if in prev window')
         if self.inTimeSpan(now,prevTransit,schedule.windowMax,schedule.repeatDays):
             self.log.debug('    yes - turn on')
-            return True
+            return True,until
 
         self.log.debug('  checking if in next window')
         if self.inTimeSpan(now,nextTransit,schedule.windowMax,schedule.repeatDays):
             self.log.debug('    yes - turn on')
-            return True
+            return True,until
 
         self.log.debug('  failed to match any criteria')
 
-        return False
+        return False,until
 
 class SolarDataMonitorComponent(ConfigComponent,SolarDataMonitorMixin):
 
@@ -25,6 +25,12 @@
 #   2018-04-20  Todd Valentic
 #               Add balloon_id
 #
+#   2026-10-18  Todd Valentic
+#               Return a buffer view of the remaining data in unpack()
+#                   rather than slicing a copy after every record, which
+#                   made parsing quadratic in the file size. See the
+#                   recordfile module for indexed/columnar access.
+#
 ##########################################################################
 
 from datetime import datetime
@@ -107,8 +113,8 @@ class SnapshotBase:
 
     def unpack(self,format,data):
         size = struct.calcsize(format)
-        rec = struct.unpack(format,data[0:size])
-        return rec,data[size:]
+        rec = struct.unpack_from(format,data)
+        return rec,buffer(data,size)
 
 def read(filename,snapshotFactory,**kw):
 
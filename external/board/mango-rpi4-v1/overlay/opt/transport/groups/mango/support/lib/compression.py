@@ -0,0 +1,121 @@
+#!/usr/bin/env python2
+
+##########################################################################
+#
+#   Streaming file compression
+#
+#   Compress (or copy) files in fixed sized chunks so that we never
+#   need to hold the whole file in memory. The codec is selectable:
+#
+#       bz2     - best ratio, slowest (default, matches older files)
+#       gzip    - much faster on the Pi, somewhat larger output
+#
+#   Both codecs present the same compress()/flush() interface, so
+#   the copy loop does not care which one is in use.
+#
+#   2026-10-18  Todd Valentic
+#               Initial implementation. Split off from DataMonitor.
+#
+##########################################################################
+
+import os
+import bz2
+import zlib
+
+CHUNKSIZE = 1024*1024
+
+EXTENSIONS = {
+    'bz2':  '.bz2',
+    'gzip': '.gz'
+}
+
+DEFAULT_LEVELS = {
+    'bz2':  9,
+    'gzip': 6
+}
+
+def extension(codec):
+
+    if codec not in EXTENSIONS:
+        raise ValueError('Unknown compression codec: %s' % codec)
+
+    return EXTENSIONS[codec]
+
+def isCompressed(filename):
+    return os.path.splitext(filename)[1] in EXTENSIONS.values()
+
+def compressor(codec,level=None):
+
+    if level is None:
+        level = DEFAULT_LEVELS.get(codec)
+
+    if codec == 'bz2':
+        return bz2.BZ2Compressor(level)
+
+    if codec == 'gzip':
+        # wbits offset of 16 writes a gzip header/trailer
+        return zlib.compressobj(level,zlib.DEFLATED,16+zlib.MAX_WBITS)
+
+    raise ValueError('Unknown compression codec: %s' % codec)
+
+def copyFile(srcname,destname,codec=None,level=None,chunksize=CHUNKSIZE,
+             sync=True):
+    """Copy srcname to destname, compressing in chunks if codec is set.
+
+       Returns a tuple of (input bytes, output bytes).
+    """
+
+    if codec:
+        encoder = compressor(codec,level)
+    else:
+        encoder = None
+
+    insize = 0
+    outsize = 0
+
+    with open(srcname,'rb') as input, open(destname,'wb') as output:
+
+        while True:
+            chunk = input.read(chunksize)
+            if not chunk:
+                break
+
+            insize += len(chunk)
+
+            if encoder:
+                chunk = encoder.compress(chunk)
+
+            if chunk:
+                output.write(chunk)
+                outsize += len(chunk)
+
+        if encoder:
+            chunk = encoder.flush()
+            output.write(chunk)
+            outsize += len(chunk)
+
+        if sync:
+            output.flush()
+            os.fsync(output.fileno())
+
+    return insize,outsize
+
+if __name__ == '__main__':
+
+    import sys
+
+    if len(sys.argv) < 2:
+        print 'Usage: compression.py filename [bz2|gzip]'
+        sys.exit(1)
+
+    filename = sys.argv[1]
+
+    if len(sys.argv) > 2:
+        codec = sys.argv[2]
+    else:
+        codec = 'bz2'
+
+    insize,outsize = copyFile(filename,filename+extension(codec),codec)
+
+    print '%s: %d -> %d' % (filename,insize,outsize)
+
@@ -0,0 +1,394 @@
+#!/usr/bin/env python2
+
+##########################################################################
+#
+#   Event delivery engine
+#
+#   Fans notifications out to XML-RPC observers so that a slow or dead
+#   observer only holds up its own events:
+#
+#       - Each observer (url,method) has its own bounded queue. When
+#         it is full either the oldest entry is dropped or the new one
+#         is refused (policy 'oldest' or 'newest').
+#
+#       - A pending notification for the same event is replaced by
+#         the newer one (coalesce), since observers only care about
+#         the latest value. It keeps the time of the first one, so the
+#         latency shows how long the observer has been behind.
+#
+#       - A pool of worker threads delivers the queues. An observer is
+#         only worked on by one thread at a time, so its events arrive
+#         in order and its connection (kept open and reused) is not
+#         shared. Up to batchSize queued events go in one round trip
+#         with system.multicall if the observer supports it.
+#
+#       - If the observer can't be reached, the events not delivered
+#         are put back and the observer is skipped for a backoff time
+#         that doubles on each failure. An event is dropped after
+#         maxRetries. A fault returned by the observer is not retried,
+#         and in a batch only the calls that faulted count as failed.
+#
+#       - Per observer counts and the end-to-end latency (notify to
+#         delivered) are kept for getStats().
+#
+#   Example:
+#
+#       delivery = Delivery(workers=4)
+#       delivery.start()
+#       delivery.notify('gps',[('http://localhost:8411','update')],('gps',data))
+#
+#   2026-10-18  Todd Valentic
+#               Initial implementation
+#
+##########################################################################
+
+import time
+import heapq
+import socket
+import logging
+import threading
+import xmlrpclib
+import collections
+
+from rpcclient import ServiceClient
+
+class Entry:
+
+    def __init__(self,event,args):
+        self.event = event
+        self.args = args
+        self.queued = time.time()
+        self.attempts = 0
+
+class Observer:
+
+    def __init__(self,url,method,log):
+
+        self.url = url
+        self.method = method
+        self.client = ServiceClient(xmlrpclib.ServerProxy(url),url,log=log)
+
+        self.queue = collections.deque()
+        self.pending = {}           # event -> entry still in the queue
+        self.busy = False
+        self.scheduled = False      # in the ready list or waiting to retry
+        self.removed = False
+        self.retryTime = 0
+        self.backoff = 0
+
+        self.resetStats()
+
+    def resetStats(self):
+        self.stats = dict(
+            queued      = 0,
+            delivered   = 0,
+            coalesced   = 0,
+            dropped     = 0,
+            failed      = 0,
+            retries     = 0,
+            calls       = 0,
+            latency     = 0.0,      # sum, for the average
+            maxLatency  = 0.0,
+            lastError   = ''
+            )
+
+    def name(self):
+        return '%s %s' % (self.url,self.method)
+
+    def getStats(self):
+
+        stats = dict(self.stats)
+        latency = stats.pop('latency')
+
+        if stats['delivered']:
+            stats['avgLatency'] = latency/stats['delivered']
+        else:
+            stats['avgLatency'] = 0.0
+
+        stats['depth'] = len(self.queue)
+        stats['backoff'] = self.backoff
+        stats['url'] = self.url
+        stats['method'] = self.method
+
+        return stats
+
+class Delivery:
+
+    def __init__(self,workers=4,maxQueue=100,policy='oldest',batchSize=10,
+                 coalesce=True,maxRetries=3,backoffMin=1,backoffMax=60,
+                 log=None,isRunning=None):
+
+        self.numWorkers = max(workers,1)
+        self.maxQueue = maxQueue
+        self.policy = policy
+        self.batchSize = max(batchSize,1)
+        self.coalesce = coalesce
+        self.maxRetries = maxRetries
+        self.backoffMin = backoffMin
+        self.backoffMax = backoffMax
+        self.log = log or logging
+        self.isRunning = isRunning or (lambda: True)
+
+        self.cond = threading.Condition()
+        self.observers = {}         # (url,method) -> Observer
+        self.ready = collections.deque()
+        self.delayed = []           # heap of (time,seq,observer)
+        self.seq = 0
+        self.stopped = False
+        self.threads = []
+
+    #-- Queueing (called with the lock held) -----------------------------
+
+    def _observer(self,signature):
+
+        if signature not in self.observers:
+            url,method = signature
+            self.observers[signature] = Observer(url,method,self.log)
+
+        return self.observers[signature]
+
+    def _schedule(self,observer):
+
+        if observer.busy or observer.scheduled or observer.removed:
+            return
+
+        if not observer.queue:
+            return
+
+        observer.scheduled = True
+
+        if observer.retryTime > time.time():
+            self.seq += 1
+            heapq.heappush(self.delayed,(observer.retryTime,self.seq,observer))
+        else:
+            self.ready.append(observer)
+
+        self.cond.notify()
+
+    def _enqueue(self,observer,entry,front=False):
+
+        stats = observer.stats
+
+        if self.coalesce and entry.event in observer.pending:
+            queued = observer.pending[entry.event]
+            if front:
+                # Retried entry was replaced while it was out
+                queued.queued = min(queued.queued,entry.queued)
+                stats['coalesced'] += 1
+                return
+            queued.args = entry.args
+            stats['coalesced'] += 1
+            return
+
+        if len(observer.queue) >= self.maxQueue:
+            if self.policy == 'newest' and not front:
+                stats['dropped'] += 1
+                return
+            if front:
+                dropped = observer.queue.pop()
+            else:
+                dropped = observer.queue.popleft()
+            if observer.pending.get(dropped.event) is dropped:
+                del observer.pending[dropped.event]
+            stats['dropped'] += 1
+
+        if front:
+            observer.queue.appendleft(entry)
+        else:
+            observer.queue.append(entry)
+            stats['queued'] += 1
+
+        observer.pending[entry.event] = entry
+
+    def _next(self):
+        """Wait for an observer that has work."""
+
+        with self.cond:
+
+            while not self._stopping():
+
+                now = time.time()
+
+                while self.delayed and self.delayed[0][0] <= now:
+                    retryTime,seq,observer = heapq.heappop(self.delayed)
+                    self.ready.append(observer)
+
+                while self.ready:
+
+                    observer = self.ready.popleft()
+                    observer.scheduled = False
+
+                    if observer.removed or not observer.queue:
+                        continue
+
+                    batch = []
+                    while observer.queue and len(batch) < self.batchSize:
+                        entry = observer.queue.popleft()
+                        if observer.pending.get(entry.event) is entry:
+                            del observer.pending[entry.event]
+                        batch.append(entry)
+
+                    observer.busy = True
+                    observer.stats['calls'] += 1
+
+                    return observer,batch
+
+                if self.delayed:
+                    timeout = min(self.delayed[0][0]-now,1)
+                else:
+                    timeout = 1
+
+                self.cond.wait(timeout)
+
+        return None,None
+
+    def _finish(self,observer,delivered=[],failed=[],retry=[],error=None):
+
+        now = time.time()
+
+        with self.cond:
+
+            observer.busy = False
+            stats = observer.stats
+
+            for entry in delivered:
+                latency = now-entry.queued
+                stats['delivered'] += 1
+                stats['latency'] += latency
+                stats['maxLatency'] = max(stats['maxLatency'],latency)
+
+            if error is not None:
+                stats['lastError'] = str(error)[:200]
+
+            if retry:
+                observer.backoff = min(max(observer.backoff*2,self.backoffMin),
+                                       self.backoffMax)
+                observer.retryTime = now+observer.backoff
+            else:
+                # The observer answered
+                observer.backoff = 0
+                observer.retryTime = 0
+
+            stats['failed'] += len(failed)
+
+            # Put back in the original order, up to maxRetries
+
+            for entry in reversed(retry):
+                entry.attempts += 1
+                if entry.attempts <= self.maxRetries:
+                    stats['retries'] += 1
+                    self._enqueue(observer,entry,front=True)
+                else:
+                    stats['failed'] += 1
+
+            self._schedule(observer)
+
+    def _worker(self):
+
+        while True:
+
+            observer,batch = self._next()
+
+            if observer is None:
+                break
+
+            calls = [(observer.method,entry.args) for entry in batch]
+
+            try:
+                results = observer.client.callMany(calls,faults=True)
+            except xmlrpclib.Fault,e:
+                self._finish(observer,failed=batch,error=e)
+            except (socket.error,xmlrpclib.ProtocolError,IOError),e:
+                self._reconnect(observer)
+                self._finish(observer,retry=batch,error=e)
+            except Exception,e:
+                self.log.exception('Problem notifying %s' % observer.name())
+                self._finish(observer,failed=batch,error=e)
+            else:
+                # Only the calls that faulted have failed. If the
+                # calls went one at a time, the ones after a lost
+                # connection hold that error and are retried.
+                delivered = []
+                failed = []
+                retry = []
+                error = None
+                for entry,result in zip(batch,results):
+                    if isinstance(result,xmlrpclib.Fault):
+                        failed.append(entry)
+                        error = result
+                    elif isinstance(result,Exception):
+                        retry.append(entry)
+                        error = result
+                    else:
+                        delivered.append(entry)
+                if retry:
+                    self._reconnect(observer)
+                self._finish(observer,delivered,failed,retry,error)
+
+    def _reconnect(self,observer):
+        # Start over with a new connection before anyone else
+        # can pick up this observer again
+        observer.client.proxy = xmlrpclib.ServerProxy(observer.url)
+
+    def _stopping(self):
+        return self.stopped or not self.isRunning()
+
+    #-- Public methods ---------------------------------------------------
+
+    def start(self):
+
+        self.stopped = False
+
+        for k in range(self.numWorkers):
+            thread = threading.Thread(target=self._worker,name='delivery-%d' % k)
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self,timeout=5):
+
+        with self.cond:
+            self.stopped = True
+            self.cond.notifyAll()
+
+        for thread in self.threads:
+            thread.join(timeout)
+
+        self.threads = []
+
+    def notify(self,event,signatures,args):
+        """Queue event for each of the (url,method) observers."""
+
+        with self.cond:
+            for signature in signatures:
+                observer = self._observer(signature)
+                self._enqueue(observer,Entry(event,args))
+                self._schedule(observer)
+
+    def removeObserver(self,url,method):
+
+        with self.cond:
+            observer = self.observers.pop((url,method),None)
+            if observer:
+                observer.removed = True
+                observer.stats['dropped'] += len(observer.queue)
+                observer.queue.clear()
+                observer.pending = {}
+
+    def getStats(self):
+
+        with self.cond:
+            return dict([(observer.name(),observer.getStats())
+                         for observer in self.observers.values()])
+
+    def resetStats(self):
+
+        with self.cond:
+            for observer in self.observers.values():
+                observer.resetStats()
+
+    def depth(self):
+
+        with self.cond:
+            return sum([len(observer.queue) for observer in self.observers.values()])
+
@@ -0,0 +1,265 @@
+#!/usr/bin/env python2
+
+##########################################################################
+#
+#   Solar ephemeris cache
+#
+#   The day/night, night and solar monitors only need to know if the
+#   sun is above a few fixed elevation angles and where the nearest
+#   solar transits are. Rather than building an observer and running
+#   the ephem searches on every scheduler tick, we compute the times
+#   for a few days around now once per location and answer from the
+#   sorted tables with a binary search.
+#
+#   The tables are kept per location and are recomputed when the
+#   position moves more than threshold km or the time runs past the
+#   end of the table. Crossing times for an elevation angle are found
+#   the first time that angle is asked for.
+#
+#   All times are unix seconds (UTC). Elevations follow ephem with the
+#   sun center and default refraction, same as sun.alt.
+#
+#   Example:
+#
+#       sun = ephemeris.shared().get(lat,lon)
+#
+#       if sun.isAbove(-6,now):
+#           ...
+#       nextChange = sun.nextCrossing(-6,now)
+#
+#   2026-10-18  Todd Valentic
+#               Initial implementation
+#
+##########################################################################
+
+import bisect
+import logging
+import math
+import threading
+import time
+
+import ephem
+
+DAY = 86400.0
+
+EPOCH = 25567.5     # 1970-01-01 in ephem days (from 1899-12-31 12:00)
+
+def toUnix(date):
+    return (float(date)-EPOCH)*DAY
+
+def toEphem(t):
+    return ephem.Date(t/DAY+EPOCH)
+
+def distance(lat1,lon1,lat2,lon2):
+    """Great circle distance in km."""
+
+    lat1,lon1,lat2,lon2 = [math.radians(x) for x in (lat1,lon1,lat2,lon2)]
+
+    a = math.sin((lat2-lat1)/2)**2 + \
+        math.cos(lat1)*math.cos(lat2)*math.sin((lon2-lon1)/2)**2
+
+    return 2*6371.0*math.asin(min(1,math.sqrt(a)))
+
+class SolarTable:
+
+    def __init__(self,latitude,longitude,start,days=3):
+
+        self.latitude = latitude
+        self.longitude = longitude
+
+        # Start a day back so the previous transit is always there
+
+        self.start = start-DAY
+        self.stop = start+days*DAY
+
+        self.lock = threading.Lock()
+        self.angles = {}            # angle -> (initial state,times,rising)
+
+        self.transits = self._transits()
+
+    def _observer(self,t,horizon=0):
+
+        station = ephem.Observer()
+        station.lat = str(self.latitude)
+        station.lon = str(self.longitude)
+        station.date = toEphem(t)
+        station.horizon = str(horizon)
+
+        return station
+
+    def _transits(self):
+
+        sun = ephem.Sun()
+        station = self._observer(self.start)
+        transits = []
+
+        # Include one past the end so nextTransit() always has an answer
+
+        while True:
+            t = toUnix(station.next_transit(sun))
+            transits.append(t)
+            if t > self.stop:
+                break
+            station.date = toEphem(t+60)
+
+        return transits
+
+    def _crossings(self,angle):
+
+        sun = ephem.Sun()
+        station = self._observer(self.start,angle)
+
+        sun.compute(station)
+        initial = math.degrees(sun.alt) >= angle
+
+        times = []
+        rising = []
+
+        t = self.start
+
+        while t < self.stop+DAY:
+
+            station.date = toEphem(t)
+            events = []
+
+            for search,isRising in [(station.next_rising,True),
+                                    (station.next_setting,False)]:
+                try:
+                    events.append((toUnix(search(sun,use_center=True)),isRising))
+                except (ephem.AlwaysUpError,ephem.NeverUpError):
+                    pass
+
+            if not events:
+                # Sun stays on one side of this angle. Look again later.
+                t += DAY/2
+                continue
+
+            t,isRising = min(events)
+
+            if not times and isRising == initial:
+                # Rounding at the table start, already in this state
+                pass
+            elif times and rising[-1] == isRising:
+                pass
+            else:
+                times.append(t)
+                rising.append(isRising)
+
+            t += 60
+
+        return initial,times,rising
+
+    def _table(self,angle):
+
+        angle = float(angle)
+
+        with self.lock:
+            if angle not in self.angles:
+                self.angles[angle] = self._crossings(angle)
+            return self.angles[angle]
+
+    #-- Public methods ---------------------------------------------------
+
+    def covers(self,t):
+        return self.start+DAY <= t <= self.stop-DAY
+
+    def isAbove(self,angle,t):
+        """True if the sun is at or above angle (deg) at time t."""
+
+        initial,times,rising = self._table(angle)
+        index = bisect.bisect_right(times,t)
+
+        if index == 0:
+            return initial
+
+        return rising[index-1]
+
+    def nextCrossing(self,angle,t,rising=None):
+        """Next time after t the sun crosses angle (None if not soon).
+
+           rising=True/False only looks at rising/setting crossings.
+        """
+
+        initial,times,directions = self._table(angle)
+        index = bisect.bisect_right(times,t)
+
+        for k in range(index,len(times)):
+            if rising is None or directions[k] == rising:
+                return times[k]
+
+        return None
+
+    def prevTransit(self,t):
+        index = bisect.bisect_right(self.transits,t)
+        return self.transits[max(index-1,0)]
+
+    def nextTransit(self,t):
+        index = bisect.bisect_right(self.transits,t)
+        return self.transits[min(index,len(self.transits)-1)]
+
+    def altitude(self,t):
+        """Direct calculation, for logging and checks."""
+
+        sun = ephem.Sun()
+        sun.compute(self._observer(t))
+
+        return math.degrees(sun.alt)
+
+class Ephemeris:
+
+    def __init__(self,threshold=10,days=3,maxTables=4,log=None):
+
+        self.threshold = threshold      # km
+        self.days = days
+        self.maxTables = maxTables
+        self.log = log or logging
+
+        self.lock = threading.Lock()
+        self.tables = []                # most recently used first
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self,latitude,longitude,t=None):
+
+        if t is None:
+            t = time.time()
+
+        latitude = float(latitude)
+        longitude = float(longitude)
+
+        with self.lock:
+
+            for table in self.tables:
+                if table.covers(t) and distance(latitude,longitude,
+                        table.latitude,table.longitude) <= self.threshold:
+                    self.hits += 1
+                    self.tables.remove(table)
+                    self.tables.insert(0,table)
+                    return table
+
+            self.misses += 1
+
+            self.log.debug('Computing solar table for %.3f,%.3f' % \
+                (latitude,longitude))
+
+            table = SolarTable(latitude,longitude,t,self.days)
+
+            self.tables.insert(0,table)
+            del self.tables[self.maxTables:]
+
+            return table
+
+_shared = None
+_sharedLock = threading.Lock()
+
+def shared():
+    """Process wide instance, used by all of the monitors."""
+
+    global _shared
+
+    with _sharedLock:
+        if _shared is None:
+            _shared = Ephemeris()
+        return _shared
+
@@ -0,0 +1,496 @@
+#!/usr/bin/env python2
+
+##########################################################################
+#
+#   Event driven file watcher
+#
+#   Track new files below a directory tree using inotify instead of
+#   repeatedly walking it (i.e. find -newer). A persistent index of
+#   the files already handled (path and mtime) is kept on disk, so
+#   we know what is new across restarts.
+#
+#   A full rescan of the tree is done at startup and if the kernel
+#   event queue overflows. If inotify is not available, every call
+#   to poll() does a rescan.
+#
+#   Files are reported once they are closed after writing or moved
+#   into place. Names starting with '.' (partial files) are ignored.
+#   The match patterns follow find -path/-name semantics:
+#
+#       matchPaths - matched against the full pathname
+#       matchNames - matched against the basename
+#
+#   waitAny() blocks on the inotify descriptors of one or more
+#   watchers, so new files can be handled as soon as they show up
+#   instead of on the next poll.
+#
+#   The index is an append log. It is rewritten once it has more
+#   than maxLines lines (and twice the number of live entries).
+#
+#   Example:
+#
+#       watcher = FileWatcher('/transmit/outbound/gps','gps.index')
+#       watcher.start()
+#
+#       while True:
+#           waitAny([watcher],timeout=60)
+#           for pathname in watcher.poll():
+#               post(pathname)
+#               watcher.markDone(pathname)
+#
+#   See support/bin/watchtest.py for a test against a temp directory.
+#
+#   2026-10-18  Todd Valentic
+#               Initial implementation
+#               Add waitAny() and compact the index past maxLines
+#               waitAny() returns the watchers with events
+#
+##########################################################################
+
+import os
+import errno
+import ctypes
+import fnmatch
+import logging
+import select
+import struct
+import time
+
+#-- inotify --------------------------------------------------------------
+
+IN_CLOSE_WRITE  = 0x00000008
+IN_MOVED_FROM   = 0x00000040
+IN_MOVED_TO     = 0x00000080
+IN_CREATE       = 0x00000100
+IN_DELETE       = 0x00000200
+IN_DELETE_SELF  = 0x00000400
+IN_MOVE_SELF    = 0x00000800
+IN_Q_OVERFLOW   = 0x00004000
+IN_IGNORED      = 0x00008000
+IN_ONLYDIR      = 0x01000000
+IN_ISDIR        = 0x40000000
+
+IN_NONBLOCK     = 0x00000800
+IN_CLOEXEC      = 0x00080000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | \
+             IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+
+EVENT = struct.Struct('iIII')
+
+class Overflow(Exception):
+    pass
+
+class Inotify:
+
+    def __init__(self):
+
+        libc = ctypes.CDLL(None,use_errno=True)
+
+        self._add_watch = libc.inotify_add_watch
+        self._rm_watch = libc.inotify_rm_watch
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK|IN_CLOEXEC)
+
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err,os.strerror(err))
+
+        self.paths = {}     # watch descriptor -> path
+
+    def fileno(self):
+        return self.fd
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+        self.fd = -1
+        self.paths = {}
+
+    def add(self,path,mask=WATCH_MASK):
+
+        wd = self._add_watch(self.fd,path,mask)
+
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err,os.strerror(err),path)
+
+        self.paths[wd] = path
+
+        return wd
+
+    def clear(self):
+        for wd in self.paths.keys():
+            self._rm_watch(self.fd,wd)
+        self.paths = {}
+
+    def read(self):
+        """Return a list of pending (path,mask,name) events."""
+
+        events = []
+
+        while True:
+            try:
+                data = os.read(self.fd,64*1024)
+            except OSError,e:
+                if e.errno == errno.EAGAIN:
+                    break
+                raise
+
+            offset = 0
+
+            while offset < len(data):
+                wd,mask,cookie,length = EVENT.unpack_from(data,offset)
+                offset += EVENT.size
+                name = data[offset:offset+length].rstrip('\0')
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    raise Overflow()
+
+                path = self.paths.get(wd)
+
+                if mask & IN_IGNORED:
+                    self.paths.pop(wd,None)
+
+                if path is not None:
+                    events.append((path,mask,name))
+
+        return events
+
+#-- Persistent index -----------------------------------------------------
+
+class FileIndex:
+    """Pathnames already handled and their mtime at that time.
+
+       Stored as an append-only text file of "mtime<tab>path" lines
+       (a negative mtime removes the entry). It is compacted on load
+       and when the log grows past maxLines.
+    """
+
+    def __init__(self,filename,maxLines=10000):
+        self.filename = filename
+        self.maxLines = maxLines
+        self.entries = {}
+        self.output = None
+        self.lines = 0
+        self.compactions = 0
+
+    def exists(self):
+        return os.path.exists(self.filename)
+
+    def load(self):
+
+        self.entries = {}
+
+        if self.exists():
+            with open(self.filename) as input:
+                for line in input:
+                    try:
+                        mtime,path = line.rstrip('\n').split('\t',1)
+                        mtime = float(mtime)
+                    except ValueError:
+                        continue    # partial line from a crash
+                    if mtime < 0:
+                        self.entries.pop(path,None)
+                    else:
+                        self.entries[path] = mtime
+
+        self.compact()
+
+    def compact(self):
+
+        self.close()
+
+        tmpname = self.filename+'.tmp'
+
+        with open(tmpname,'w') as output:
+            for path,mtime in self.entries.items():
+                output.write('%r\t%s\n' % (mtime,path))
+
+        os.rename(tmpname,self.filename)
+
+        self.lines = len(self.entries)
+        self.compactions += 1
+
+    def close(self):
+        if self.output:
+            self.output.close()
+        self.output = None
+
+    def _append(self,mtime,path):
+
+        if not self.output:
+            self.output = open(self.filename,'a')
+
+        self.output.write('%r\t%s\n' % (mtime,path))
+        self.output.flush()
+
+        self.lines += 1
+
+        if self.lines > max(self.maxLines,2*len(self.entries)):
+            self.compact()
+
+    def isDone(self,path,mtime):
+        return self.entries.get(path) == mtime
+
+    def add(self,path,mtime):
+        self.entries[path] = mtime
+        self._append(mtime,path)
+
+    def remove(self,path):
+        if path in self.entries:
+            del self.entries[path]
+            self._append(-1,path)
+
+    def prune(self,existing):
+        """Drop entries for files that no longer exist."""
+
+        stale = set(self.entries).difference(existing)
+
+        for path in stale:
+            del self.entries[path]
+
+        if stale:
+            self.compact()
+
+#-- Watcher --------------------------------------------------------------
+
+class FileWatcher:
+
+    def __init__(self,startPath,indexFile,matchPaths=['*'],matchNames=['*'],
+                 maxLines=10000,log=None):
+
+        self.startPath = startPath
+        self.matchPaths = matchPaths
+        self.matchNames = matchNames
+        self.log = log or logging
+
+        self.index = FileIndex(indexFile,maxLines)
+        self.pending = set()
+        self.inotify = None
+
+    #-- Internal methods -------------------------------------------------
+
+    def _matches(self,pathname):
+
+        basename = os.path.basename(pathname)
+
+        if basename.startswith('.'):
+            return False
+
+        for pattern in self.matchNames:
+            if fnmatch.fnmatchcase(basename,pattern):
+                break
+        else:
+            return False
+
+        for pattern in self.matchPaths:
+            if fnmatch.fnmatchcase(pathname,pattern):
+                return True
+
+        return False
+
+    def _mtime(self,pathname):
+        try:
+            return os.path.getmtime(pathname)
+        except OSError:
+            return None
+
+    def _check(self,pathname,cutoff=None):
+
+        if not self._matches(pathname):
+            return
+
+        mtime = self._mtime(pathname)
+
+        if mtime is None:
+            self.pending.discard(pathname)
+        elif cutoff is not None and mtime <= cutoff:
+            self.index.add(pathname,mtime)
+        elif not self.index.isDone(pathname,mtime):
+            self.pending.add(pathname)
+
+    def _watch(self,path):
+
+        if not self.inotify:
+            return
+
+        try:
+            self.inotify.add(path)
+        except OSError,e:
+            if e.errno != errno.ENOENT:
+                self.log.error('Failed to watch %s: %s' % (path,e))
+
+    def _scan(self,top,cutoff=None):
+        """Walk the tree below top, add watches and queue new files."""
+
+        existing = set()
+
+        for dirpath,dirnames,filenames in os.walk(top):
+            self._watch(dirpath)
+            for filename in filenames:
+                pathname = os.path.join(dirpath,filename)
+                existing.add(pathname)
+                self._check(pathname,cutoff)
+
+        return existing
+
+    def _rescan(self,cutoff=None):
+
+        self.log.info('Scanning %s' % self.startPath)
+
+        if self.inotify:
+            self.inotify.clear()
+
+        self.pending = set()
+        existing = self._scan(self.startPath,cutoff)
+        self.index.prune(existing)
+
+    def _handle(self,path,mask,name):
+
+        pathname = os.path.join(path,name)
+
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE|IN_MOVED_TO):
+                # Files may have landed before the watch was added
+                self._scan(pathname)
+            return
+
+        if mask & (IN_CLOSE_WRITE|IN_MOVED_TO):
+            self._check(pathname)
+
+        elif mask & (IN_DELETE|IN_MOVED_FROM):
+            self.pending.discard(pathname)
+            self.index.remove(pathname)
+
+    #-- Public methods ---------------------------------------------------
+
+    def start(self,cutoff=None):
+        """Load the index and do a full scan.
+
+           Files older than cutoff (unix time) are marked as done.
+           This is used to carry over the state from a timestamp file.
+        """
+
+        if not os.path.isdir(self.startPath):
+            os.makedirs(self.startPath)
+
+        self.index.load()
+
+        try:
+            self.inotify = Inotify()
+        except (OSError,AttributeError),e:
+            self.log.error('inotify not available, using rescans: %s' % e)
+            self.inotify = None
+
+        self._rescan(cutoff)
+
+    def stop(self):
+
+        if self.inotify:
+            self.inotify.close()
+        self.inotify = None
+
+        self.index.close()
+
+    def fileno(self):
+        return self.inotify.fileno()
+
+    def wait(self,timeout):
+        """Block until there are events or timeout secs pass."""
+        return waitAny([self],timeout)
+
+    def poll(self):
+        """Process pending events, return sorted list of new files."""
+
+        if not self.inotify:
+            self._rescan()
+        else:
+            try:
+                for path,mask,name in self.inotify.read():
+                    self._handle(path,mask,name)
+            except Overflow:
+                self.log.info('Event queue overflow')
+                self._rescan()
+
+        return sorted(self.pending)
+
+    def markDone(self,pathname,mtime=None):
+
+        if mtime is None:
+            mtime = self._mtime(pathname)
+
+        self.pending.discard(pathname)
+
+        if mtime is not None:
+            self.index.add(pathname,mtime)
+
+    def markRemoved(self,pathname):
+        self.pending.discard(pathname)
+        self.index.remove(pathname)
+
+def waitAny(watchers,timeout,isRunning=None):
+    """Block on the inotify descriptors of the watchers.
+
+       Returns the watchers that have events as soon as there are
+       any, or an empty list after timeout secs (0 = just look) or
+       if isRunning() goes False (checked every sec). Watchers
+       without inotify can't be waited on, those need to be polled
+       so we just sleep.
+    """
+
+    isRunning = isRunning or (lambda: True)
+    fds = dict([(watcher.fileno(),watcher) for watcher in watchers
+                if watcher.inotify])
+    deadline = time.time()+timeout
+
+    while isRunning():
+
+        remaining = max(deadline-time.time(),0)
+
+        if not fds:
+            if not remaining:
+                break
+            time.sleep(min(remaining,1))
+            continue
+
+        try:
+            ready,_,_ = select.select(fds.keys(),[],[],min(remaining,1))
+        except select.error,e:
+            if e.args[0] == errno.EINTR:
+                continue
+            raise
+
+        if ready:
+            return [fds[fd] for fd in ready]
+
+        if not remaining:
+            break
+
+    return []
+
+if __name__ == '__main__':
+
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+
+    if len(sys.argv) < 2:
+        print 'Usage: filewatch.py path [indexfile]'
+        sys.exit(1)
+
+    if len(sys.argv) > 2:
+        indexFile = sys.argv[2]
+    else:
+        indexFile = '/tmp/filewatch.index'
+
+    watcher = FileWatcher(sys.argv[1],indexFile)
+    watcher.start()
+
+    while True:
+        for pathname in watcher.poll():
+            print pathname
+            watcher.markDone(pathname)
+        watcher.wait(60)
+
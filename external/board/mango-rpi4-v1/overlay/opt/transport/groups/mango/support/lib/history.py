@@ -0,0 +1,236 @@
+#!/usr/bin/env python2
+
+##########################################################################
+#
+#   Time series ring buffers
+#
+#   Keeps a bounded history of the numeric values put into the cache.
+#   Each value is flattened into named fields:
+#
+#       12.5                        -> value
+#       {'volts': 12.1, 'amps': 2}  -> volts, amps
+#       {'RT': [1.0, 2.0]}          -> RT[0], RT[1]
+#       {'meta': {'timestamp': 1}}  -> meta.timestamp
+#
+#   Finite numbers and booleans are kept, anything else (strings, None)
+#   is skipped. Each field is stored in its own array('d') along with
+#   the sample times, so a sample costs 8 bytes per field. The arrays
+#   grow until they reach capacity and then wrap around. A field that
+#   shows up later, or is missing from a sample, is stored as NaN and
+#   returned as None (XML-RPC has no NaN). Fields past maxFields are
+#   ignored and only counted (new names are taken in sorted order, so
+#   the same ones are kept each time), and the memory used by a series
+#   is at most 8*capacity*(maxFields+1) bytes.
+#
+#   2026-10-18  Todd Valentic
+#               Initial implementation
+#
+##########################################################################
+
+import array
+import bisect
+import math
+
+NAN = float('nan')
+
+def flatten(value,prefix='',fields=None):
+    """Return a dict of field name -> float for the numeric leaves."""
+
+    if fields is None:
+        fields = {}
+
+    if isinstance(value,bool):
+        fields[prefix or 'value'] = float(value)
+
+    elif isinstance(value,(int,long,float)):
+        value = float(value)
+        if not (math.isnan(value) or math.isinf(value)):
+            fields[prefix or 'value'] = value
+
+    elif isinstance(value,dict):
+        for key,item in value.items():
+            name = prefix and '%s.%s' % (prefix,key) or str(key)
+            flatten(item,name,fields)
+
+    elif isinstance(value,(list,tuple)):
+        for index,item in enumerate(value):
+            flatten(item,'%s[%d]' % (prefix or 'value',index),fields)
+
+    return fields
+
+class Series:
+
+    def __init__(self,capacity=1024,maxFields=64):
+
+        self.capacity = capacity
+        self.maxFields = maxFields
+
+        self.times = array.array('d')
+        self.columns = {}           # field -> array('d')
+        self.head = 0               # next slot to write once full
+        self.dropped = 0            # field values ignored (over maxFields)
+
+    def __len__(self):
+        return len(self.times)
+
+    def append(self,timestamp,value):
+
+        fields = flatten(value)
+        size = len(self.times)
+
+        for name in sorted(fields):
+            if name not in self.columns:
+                if len(self.columns) >= self.maxFields:
+                    self.dropped += 1
+                    continue
+                self.columns[name] = array.array('d',[NAN])*size
+
+        if size < self.capacity:
+            self.times.append(timestamp)
+            for name,column in self.columns.items():
+                column.append(fields.get(name,NAN))
+        else:
+            index = self.head
+            self.times[index] = timestamp
+            for name,column in self.columns.items():
+                column[index] = fields.get(name,NAN)
+            self.head = (index+1) % self.capacity
+
+    def _order(self):
+        """Slot indices oldest first."""
+
+        size = len(self.times)
+
+        if size < self.capacity or self.head == 0:
+            return range(size)
+
+        return range(self.head,size)+range(0,self.head)
+
+    def _select(self,since,until):
+
+        order = self._order()
+        times = [self.times[index] for index in order]
+
+        start = bisect.bisect_left(times,since)
+
+        if until is None:
+            stop = len(times)
+        else:
+            stop = bisect.bisect_left(times,until)
+
+        return order[start:stop]
+
+    def fields(self):
+        return sorted(self.columns)
+
+    def query(self,since=0,fields=None,until=None):
+        """Samples since the given time.
+
+           Returns dict(times=[...],fields={name:[...]}). A field that
+           is missing from a sample is None there. Samples with none of
+           the requested fields are left out.
+        """
+
+        if not fields:
+            fields = self.fields()
+
+        columns = [(name,self.columns[name]) for name in fields if name in self.columns]
+
+        times = []
+        values = dict([(name,[]) for name,column in columns])
+
+        for index in self._select(since,until):
+
+            row = [column[index] for name,column in columns]
+
+            if all([math.isnan(x) for x in row]):
+                continue
+
+            times.append(self.times[index])
+
+            for (name,column),x in zip(columns,row):
+                if math.isnan(x):
+                    x = None
+                values[name].append(x)
+
+        return dict(times=times,fields=values)
+
+    def aggregate(self,interval,since=0,fields=None,until=None):
+        """Downsample into interval second bins.
+
+           Returns dict(times=[bin start],count=[...],
+                        fields={name:dict(mean=[],min=[],max=[],count=[])}).
+           Empty bins are left out. A field with no values in a bin
+           has a count of 0 and None for the mean, min and max.
+        """
+
+        if not fields:
+            fields = self.fields()
+
+        columns = [(name,self.columns[name]) for name in fields if name in self.columns]
+
+        bins = {}
+
+        for index in self._select(since,until):
+
+            start = math.floor(self.times[index]/interval)*interval
+
+            if start not in bins:
+                bins[start] = [0,{}]
+
+            entry = bins[start]
+            entry[0] += 1
+
+            for name,column in columns:
+                x = column[index]
+                if math.isnan(x):
+                    continue
+                stats = entry[1].get(name)
+                if stats is None:
+                    entry[1][name] = [x,x,x,1]
+                else:
+                    stats[0] += x
+                    stats[1] = min(stats[1],x)
+                    stats[2] = max(stats[2],x)
+                    stats[3] += 1
+
+        times = sorted(bins)
+        results = {}
+
+        for name,column in columns:
+            mean = []
+            low = []
+            high = []
+            count = []
+            for start in times:
+                stats = bins[start][1].get(name)
+                if stats is None:
+                    stats = [None,None,None,0]
+                else:
+                    stats[0] = stats[0]/stats[3]
+                mean.append(stats[0])
+                low.append(stats[1])
+                high.append(stats[2])
+                count.append(stats[3])
+            results[name] = dict(mean=mean,min=low,max=high,count=count)
+
+        count = [bins[start][0] for start in times]
+
+        return dict(times=times,count=count,fields=results)
+
+    def memory(self):
+        """Bytes used by the sample arrays."""
+
+        itemsize = self.times.itemsize
+        return itemsize*len(self.times)*(len(self.columns)+1)
+
+    def info(self):
+        return dict(
+            samples     = len(self.times),
+            capacity    = self.capacity,
+            fields      = len(self.columns),
+            dropped     = self.dropped,
+            bytes       = self.memory(),
+            maxbytes    = 8*self.capacity*(self.maxFields+1)
+            )
+
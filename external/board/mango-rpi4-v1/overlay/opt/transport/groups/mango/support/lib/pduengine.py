@@ -0,0 +1,438 @@
+#!/usr/bin/env python2
+
+##########################################################################
+#
+#   PDU command engine
+#
+#   Holds a single connection to a PDU (see pdulib.py) and runs all of
+#   the traffic to it from one background thread:
+#
+#       - A full status sweep (RH, RP, RS, RT, RLTC, ...) is done every
+#         rate seconds and published as a timestamped snapshot. Reads
+#         are served from the snapshot if it is newer than maxAge,
+#         otherwise the caller waits for the next sweep (which is
+#         shared by everyone waiting on it). maxAge defaults to 1.5
+#         times the rate and is never less than the rate, otherwise
+#         most reads would force an extra sweep.
+#
+#       - Commands are queued and run in order between sweeps. A set
+#         power (SP) command replaces any SP for the same rail that is
+#         still waiting, so only the last state is sent. Identical
+#         commands that are waiting are only run once.
+#
+#       - After a batch of SP commands only the affected state is
+#         updated in the snapshot: the commanded rail in RP and one
+#         read of RS for the actual state.
+#
+#   If a command fails, the connection is closed and reopened before
+#   the next try, up to maxRetries. Any other error in the engine
+#   thread is logged and fails the waiting callers right away.
+#
+#   Example:
+#
+#       engine = PDUEngine(PDU(model='v2',addr='127.0.0.1:8880'),rate=60)
+#       engine.start()
+#
+#       status = engine.getSnapshot(maxAge=10)
+#       engine.command('SP',3,'on')
+#
+#   2026-10-18  Todd Valentic
+#               Initial implementation
+#
+##########################################################################
+
+import copy
+import time
+import logging
+import threading
+
+class Request:
+
+    def __init__(self,cmd,args):
+        self.cmd = cmd
+        self.args = args
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 1
+
+    def key(self):
+        if self.cmd == 'SP':
+            return (self.cmd,str(self.args[0]))
+        return (self.cmd,)+tuple(self.args)
+
+    def finish(self,result=None,error=None):
+        self.result = result
+        self.error = error
+        self.done.set()
+
+class PDUEngine:
+
+    def __init__(self,pdu,rate=60,maxAge=None,timeout=30,
+                 maxRetries=3,retryWait=2,log=None,isRunning=None):
+
+        self.pdu = pdu
+        self.rate = rate
+        self.timeout = timeout
+        self.maxRetries = maxRetries
+        self.retryWait = retryWait
+        self.log = log or logging
+        self.isRunning = isRunning or (lambda: True)
+
+        if maxAge is None:
+            maxAge = 1.5*rate
+        elif maxAge < rate:
+            self.log.warning('snapshot maxAge %ss is less than the %ss rate, using %ss' % \
+                (maxAge,rate,rate))
+            maxAge = rate
+
+        self.maxAge = maxAge
+
+        self.cond = threading.Condition()
+        self.queue = []             # pending requests, in order
+        self.pending = {}           # key -> request
+        self.inflight = []          # requests taken by the engine thread
+        self.sweepWanted = False
+        self.sweepCount = 0
+        self.stopped = False
+        self.connected = False
+        self.thread = None
+
+        self.snapshot = None
+        self.snapshotTime = 0
+        self.sweepError = None
+
+        self.resetStats()
+
+    def resetStats(self):
+        self.stats = dict(
+            reads       = 0,    # getSnapshot() calls
+            hits        = 0,    # served from the snapshot
+            sweeps      = 0,
+            sweepSecs   = 0.0,
+            commands    = 0,    # command() calls
+            sent        = 0,    # commands sent to the PDU
+            coalesced   = 0,
+            refreshes   = 0,
+            errors      = 0,
+            reconnects  = 0
+            )
+
+    #-- Connection -------------------------------------------------------
+
+    def _open(self):
+        if not self.connected:
+            self.pdu.open()
+            self.connected = True
+
+    def _close(self):
+        if self.connected:
+            self.connected = False
+            try:
+                self.pdu.close()
+            except:
+                self.log.exception('Problem closing PDU')
+
+    def _retry(self,func,*args):
+
+        attempt = 0
+
+        while True:
+            try:
+                self._open()
+                return func(*args)
+            except:
+                self.stats['errors'] += 1
+                attempt += 1
+                if attempt > self.maxRetries or not self._running():
+                    self._close()
+                    raise
+                self.log.exception('PDU error, retrying (%d/%d)' % \
+                    (attempt,self.maxRetries))
+                self._close()
+                self.stats['reconnects'] += 1
+                time.sleep(self.retryWait)
+
+    def _running(self):
+        return not self.stopped and self.isRunning()
+
+    #-- PDU access (engine thread only) ----------------------------------
+
+    def _sweep(self):
+
+        start = time.time()
+
+        def readAll():
+            self.pdu.clearData()
+            return self.pdu.updateData()
+
+        try:
+            data = self._retry(readAll)
+        except Exception,e:
+            self.log.error('Status sweep failed: %s' % e)
+            error = e
+            data = None
+        else:
+            error = None
+
+        with self.cond:
+            if data is not None:
+                self.snapshot = copy.deepcopy(data)
+                self.snapshotTime = time.time()
+            self.sweepError = error
+            self.sweepWanted = False
+            self.sweepCount += 1
+            self.stats['sweeps'] += 1
+            self.stats['sweepSecs'] += time.time()-start
+            self.cond.notifyAll()
+
+    def _run(self,request):
+
+        func = getattr(self.pdu,request.cmd)
+        self.stats['sent'] += 1
+
+        return self._retry(func,*request.args)
+
+    def _refresh(self,rails):
+        """Update the snapshot for the rails just set by SP."""
+
+        # RP is the commanded state, so no need to ask for it
+
+        with self.cond:
+            if self.snapshot is None:
+                return
+            snapshot = self.snapshot
+            if isinstance(snapshot.get('RP'),list):
+                for rail,state in rails.items():
+                    self._setRail(snapshot['RP'],rail,state)
+
+        # RS is the actual state, read it once for the batch
+
+        if 'RS' in self.pdu.dataMap:
+            try:
+                values = self._retry(self.pdu.dataMap['RS'])
+            except Exception,e:
+                self.log.error('Failed to refresh RS: %s' % e)
+            else:
+                self.stats['refreshes'] += 1
+                with self.cond:
+                    snapshot['RS'] = list(values)
+                    snapshot['meta']['updated'] = time.time()
+
+    def _setRail(self,values,rail,state):
+
+        try:
+            index = int(rail)-1
+            current = values[index]
+        except (ValueError,IndexError):
+            return
+
+        on = state in ['on','1',1,True]
+
+        if isinstance(current,basestring):
+            values[index] = on and 'on' or 'off'
+        else:
+            values[index] = int(on)
+
+    def _cycle(self,nextSweep):
+        """Run the queued commands and sweep if due.
+
+           Returns the next sweep time, None when stopping.
+        """
+
+        with self.cond:
+
+            while self._running() and not self.queue and \
+                  not self.sweepWanted and time.time() < nextSweep:
+                self.cond.wait(min(nextSweep-time.time(),1))
+
+            if not self._running():
+                return None
+
+            batch = self.queue
+            self.queue = []
+            self.pending = {}
+            self.inflight = batch
+            sweep = self.sweepWanted or time.time() >= nextSweep
+
+        rails = {}
+        results = []
+
+        for request in batch:
+            try:
+                results.append((request,self._run(request),None))
+            except Exception,e:
+                results.append((request,None,e))
+            else:
+                if request.cmd == 'SP':
+                    rails[request.args[0]] = request.args[1]
+
+        # Update the snapshot before waking up the callers so
+        # they see their own changes
+
+        if rails:
+            self._refresh(rails)
+
+        for request,result,error in results:
+            request.finish(result,error)
+
+        with self.cond:
+            self.inflight = []
+
+        if sweep:
+            self._sweep()
+            nextSweep = time.time()+self.rate
+
+        return nextSweep
+
+    def _fail(self,error):
+        """Release everyone waiting on the engine thread."""
+
+        with self.cond:
+            for request in self.inflight:
+                if not request.done.isSet():
+                    request.finish(error=error)
+            self.inflight = []
+            self.sweepError = error
+            self.sweepWanted = False
+            self.sweepCount += 1
+            self.stats['errors'] += 1
+            self.cond.notifyAll()
+
+    def _loop(self):
+
+        nextSweep = 0
+
+        try:
+            while self._running():
+                try:
+                    nextSweep = self._cycle(nextSweep)
+                except Exception,e:
+                    self.log.exception('PDU engine error')
+                    self._fail(e)
+                    self._close()
+                    time.sleep(self.retryWait)
+                else:
+                    if nextSweep is None:
+                        break
+
+        finally:
+
+            self._close()
+
+            error = IOError('PDU engine stopped')
+
+            with self.cond:
+                self.stopped = True
+                for request in self.queue+self.inflight:
+                    if not request.done.isSet():
+                        request.finish(error=error)
+                self.queue = []
+                self.pending = {}
+                self.inflight = []
+                self.sweepError = error
+                self.sweepCount += 1
+                self.cond.notifyAll()
+
+    #-- Public methods ---------------------------------------------------
+
+    def start(self):
+        self.stopped = False
+        self.thread = threading.Thread(target=self._loop,name='pduengine')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        with self.cond:
+            self.stopped = True
+            self.cond.notifyAll()
+        if self.thread:
+            self.thread.join(self.timeout)
+        self.thread = None
+
+    def age(self):
+        if self.snapshot is None:
+            return None
+        return time.time()-self.snapshotTime
+
+    def getSnapshot(self,maxAge=None):
+        """Return the latest status, no older than maxAge seconds."""
+
+        if maxAge is None:
+            maxAge = self.maxAge
+
+        with self.cond:
+
+            self.stats['reads'] += 1
+
+            age = self.age()
+
+            if age is not None and (maxAge is None or age <= maxAge):
+                self.stats['hits'] += 1
+                return copy.deepcopy(self.snapshot)
+
+            if self.stopped:
+                raise IOError('PDU engine stopped')
+
+            # Wait for the next sweep, shared with any other readers
+
+            count = self.sweepCount
+            self.sweepWanted = True
+            self.cond.notifyAll()
+
+            deadline = time.time()+self.timeout
+
+            while self.sweepCount == count and not self.stopped:
+                remaining = deadline-time.time()
+                if remaining <= 0:
+                    raise IOError('Timeout waiting for PDU status')
+                self.cond.wait(remaining)
+
+            if self.sweepError is not None or self.snapshot is None:
+                raise IOError('Failed to read PDU status: %s' % self.sweepError)
+
+            return copy.deepcopy(self.snapshot)
+
+    def command(self,cmd,*args):
+        """Queue a command and wait for the result."""
+
+        with self.cond:
+
+            if self.stopped:
+                raise IOError('PDU engine stopped')
+
+            self.stats['commands'] += 1
+
+            request = Request(cmd,args)
+            key = request.key()
+
+            if key in self.pending:
+                queued = self.pending[key]
+                self.stats['coalesced'] += 1
+                if cmd == 'SP':
+                    # Last one wins, everyone gets the final result
+                    queued.args = args
+                queued.waiters += 1
+                request = queued
+            else:
+                self.pending[key] = request
+                self.queue.append(request)
+                self.cond.notifyAll()
+
+        if not request.done.wait(self.timeout):
+            raise IOError('Timeout running %s' % cmd)
+
+        if request.error is not None:
+            raise request.error
+
+        return request.result
+
+    def getStats(self):
+
+        with self.cond:
+            stats = dict(self.stats)
+            stats['age'] = self.age() or -1
+            stats['queued'] = len(self.queue)
+
+        return stats
+
@@ -65,6 +65,11 @@
 #   2026-03-12  Todd Valentic
 #               Add support for the MSNSwitch2 (UIS-722) model
 #
+#   2026-10-18  Todd Valentic
+#               Add open() and close() so the connection can be held
+#                   across commands (see pduengine.py)
+#               Fix super() calls in PDU_v2 and PDU_sp, socket port
+#
 ###############################################################################
 
 from ParseKit import parseFloats
@@ -156,6 +161,7 @@ class SocketInterface(InterfaceBase):
     
     def __init__(self,addr,**args):
         self.host,self.port = addr.split(':')
+        self.port = int(self.port)
         super(SocketInterface,self).__init__(addr,**args) 
 
         self.sock = None
@@ -245,14 +251,20 @@ class PDUBase(object):
             self.log=log
 
     def __enter__(self):
-        self.clearData()
-        self.interface.enter()
+        self.open()
         return self
 
     def __exit__(self,*exc_info):
         if exc_info[0]:
             import traceback
             traceback.print_exception(*exc_info)
+        self.close()
+
+    def open(self):
+        self.clearData()
+        self.interface.enter()
+
+    def close(self):
         self.interface.exit()
 
     def currentTime(self):
@@ -390,7 +402,7 @@ class PDU_v2(PDUBase):
 
     def __init__(self,addr=None,**args):
         interface = SocketInterface(addr)
-        super(PDUv2,self).__init__(interface,'v2',**args)
+        super(PDU_v2,self).__init__(interface,'v2',**args)
 
         self.addDataMap('RMBE',self.RBME)
 
@@ -410,7 +422,7 @@ class PDU_sp(PDUBase):
 
     def __init__(self,addr=None,**args):
         interface = SerialInterface(addr)
-        super(PDUsp,self).__init__(interface,'sp',**args)
+        super(PDU_sp,self).__init__(interface,'sp',**args)
 
         self.addDataMap('UP',self.UP)
 
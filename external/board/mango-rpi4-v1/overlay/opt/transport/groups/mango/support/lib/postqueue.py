@@ -0,0 +1,310 @@
+#!/usr/bin/env python2
+
+##########################################################################
+#
+#   Posting scheduler
+#
+#   Post the new files from a number of file groups with a bounded
+#   pool of worker threads. Each worker takes the highest priority
+#   group that has files waiting and is not already being worked on,
+#   posts one file and puts the group at the back of the queue (groups
+#   with the same priority take turns). So:
+#
+#       - Files within a group are posted in order, one at a time
+#         (the news posters are not thread safe).
+#       - A large file in one group does not hold up the others as
+#         long as there is a free worker.
+#       - Higher priority groups get the next free worker.
+#
+#   A group is any object with the following:
+#
+#       name                - for log messages
+#       priority            - larger goes first
+#       postFile(pathname)  - returns the number of bytes sent
+#       findFiles()         - list of new files (only used with refill)
+#
+#   If postFile() raises an exception, the rest of the files for that
+#   group are skipped for this pass (they will be found again next time).
+#
+#   With a refill function, a pass doesn't wait for every group to be
+#   empty before new files are looked for. Groups that have run out of
+#   files are checked again (findFiles) while the others are still
+#   posting: quickly before each file is taken, and by an otherwise idle
+#   worker that blocks until they have new files. So new files for a
+#   small group are not held up by a large backlog in another group.
+#
+#   Throttle is a simple rate limiter used by groups that are capped
+#   to a given bandwidth. It caps the average rate: after a file is
+#   sent it sleeps long enough to bring the rate back under the limit.
+#   A single file still goes out as fast as the link allows.
+#
+#   2026-10-18  Todd Valentic
+#               Initial implementation
+#               Check empty groups again during a pass (refill)
+#
+##########################################################################
+
+import time
+import heapq
+import logging
+import threading
+
+class Throttle:
+
+    def __init__(self,rate,sleep=time.sleep):
+        self.rate = rate        # bytes per second, 0/None = no limit
+        self.sleep = sleep
+        self.lock = threading.Lock()
+        self.nextTime = 0
+
+    def __call__(self,nbytes):
+        """Sleep after nbytes were sent so the average rate stays
+           under the limit (the burst rate is not limited)."""
+
+        if not self.rate:
+            return
+
+        with self.lock:
+            now = time.time()
+            start = max(now,self.nextTime)
+            self.nextTime = start + float(nbytes)/self.rate
+            delay = self.nextTime-now
+
+        if delay > 0:
+            self.sleep(delay)
+
+# Group states during a pass
+
+QUEUED, BUSY, IDLE, FAILED = range(4)
+
+class PostScheduler:
+
+    def __init__(self,workers=1,log=None,isRunning=None,exitOnError=False,
+                 refill=None):
+
+        self.workers = max(workers,1)
+        self.log = log or logging
+        self.isRunning = isRunning or (lambda: True)
+        self.exitOnError = exitOnError
+
+        # refill(groups,timeout,isRunning) blocks up to timeout secs
+        # (0 = just look) and returns the groups with new files
+
+        self.refill = refill
+
+        self.cond = threading.Condition()
+        self.queue = []
+        self.files = {}
+        self.state = {}
+        self.seq = 0
+        self.busy = 0
+        self.checking = False
+        self.stopped = False
+
+        self.resetStats()
+
+    def resetStats(self):
+        self.numFiles = 0
+        self.numBytes = 0
+        self.numErrors = 0
+        self.elapsed = 0.0
+
+    #-- Internal methods -------------------------------------------------
+
+    def _stopping(self):
+        return self.stopped or not self.isRunning()
+
+    def _push(self,group):
+
+        if self.files[group]:
+            self.state[group] = QUEUED
+            self.seq += 1
+            heapq.heappush(self.queue,(-group.priority,self.seq,group))
+        elif self.state[group] != FAILED:
+            self.state[group] = IDLE
+
+    def _check(self,timeout):
+        """Look for new files in the idle groups."""
+
+        groups = [group for group,state in self.state.items() if state == IDLE]
+
+        if not groups:
+            return
+
+        # Nobody else touches these groups while the lock is released
+
+        self.checking = True
+
+        for group in groups:
+            self.state[group] = BUSY
+
+        self.cond.release()
+
+        try:
+            found = self._find(groups,timeout)
+        finally:
+            self.cond.acquire()
+
+        self.checking = False
+
+        for group in groups:
+            if group not in found:
+                pass
+            elif found[group] is None:
+                self.state[group] = FAILED
+            else:
+                self.files[group] = list(found[group])
+            self._push(group)
+
+        self.cond.notifyAll()
+
+    def _find(self,groups,timeout):
+
+        # Stop waiting once the pass is over
+
+        isRunning = lambda: (self.busy or self.queue) and not self._stopping()
+        found = {}
+
+        try:
+            ready = self.refill(groups,timeout,isRunning)
+        except:
+            self.log.exception('Problem waiting for new files')
+            return found
+
+        for group in ready:
+            try:
+                found[group] = group.findFiles()
+            except SystemExit:
+                self.stopped = True
+                found[group] = None
+            except:
+                self.log.exception('Problem processing filegroup %s' % group.name)
+                if self.exitOnError:
+                    self.stopped = True
+                found[group] = None
+
+        return found
+
+    def _next(self):
+
+        with self.cond:
+
+            while not self._stopping():
+
+                if self.refill and not self.checking:
+                    if self.queue:
+                        # Quick look for new files before taking the next
+                        self._check(0)
+                    elif self.busy:
+                        # Nothing to post until the others finish
+                        # or new files show up
+                        self._check(1)
+
+                if self.queue:
+                    entry = heapq.heappop(self.queue)
+                    group = entry[-1]
+                    self.state[group] = BUSY
+                    self.busy += 1
+                    return entry,self.files[group].pop(0)
+
+                if not self.refill or not self.busy:
+                    break
+
+                self.cond.wait(1)
+
+        return None,None
+
+    def _done(self,entry,nbytes=None,failed=False):
+
+        with self.cond:
+
+            group = entry[-1]
+            self.busy -= 1
+
+            if failed:
+                self.numErrors += 1
+                self.files[group] = []
+                self.state[group] = FAILED
+            else:
+                self.numFiles += 1
+                self.numBytes += nbytes or 0
+
+            self._push(group)
+
+            self.cond.notifyAll()
+
+    def _worker(self):
+
+        while True:
+
+            entry,pathname = self._next()
+
+            if entry is None:
+                break
+
+            group = entry[-1]
+
+            try:
+                nbytes = group.postFile(pathname)
+            except SystemExit:
+                self.stopped = True
+                self._done(entry,failed=True)
+                break
+            except:
+                self.log.exception('Problem processing filegroup %s' % group.name)
+                if self.exitOnError:
+                    self.stopped = True
+                self._done(entry,failed=True)
+            else:
+                self._done(entry,nbytes)
+
+    #-- Public methods ---------------------------------------------------
+
+    def run(self,work):
+        """Post the files. work is a list of (group,pathnames).
+
+           With refill, the groups are checked for new files until
+           all of them are empty at the same time.
+
+           Returns False if we should stop (SystemExit or exitOnError).
+        """
+
+        start = time.time()
+
+        self.queue = []
+        self.files = {}
+        self.state = {}
+        self.busy = 0
+        self.checking = False
+
+        for group,pathnames in work:
+            self.files[group] = list(pathnames or [])
+            self.state[group] = IDLE
+            self._push(group)
+
+        if self.refill:
+            numWorkers = min(self.workers,len(self.state))
+        else:
+            numWorkers = min(self.workers,len(self.queue))
+
+        if not self.queue:
+            pass
+
+        elif numWorkers == 1:
+            self._worker()
+
+        elif numWorkers > 1:
+            threads = []
+
+            for k in range(numWorkers):
+                thread = threading.Thread(target=self._worker,name='post-%d' % k)
+                thread.daemon = True
+                thread.start()
+                threads.append(thread)
+
+            for thread in threads:
+                thread.join()
+
+        self.elapsed += time.time()-start
+
+        return not self.stopped
@@ -0,0 +1,588 @@
+#!/usr/bin/env python2
+
+##########################################################################
+#
+#   Indexed reader for the monitor binary record files
+#
+#   The PDU, GPS and camera monitors write versioned, big-endian
+#   records where the first byte is the format version. The layouts
+#   are described declaratively below and registered per family,
+#   keyed by that version byte.
+#
+#   Uncompressed files are memory mapped. Compressed (bz2) files are
+#   streamed through BZ2File, which decompresses incrementally, so
+#   the whole file is never held in memory.
+#
+#   A sidecar index (<filename>.idx) holds the offset, version and
+#   timestamp of each record. It is rebuilt when the data file size
+#   or mtime changes. With it we get random access to records and
+#   time range queries (bisect on the timestamps) without scanning.
+#
+#   Runs of records are decoded into columns (one array.array per
+#   numeric field) with a single struct call per block of records.
+#   Multi-valued fields such as PDU RT (20f) are split into one
+#   column per element named RT[0], RT[1], ...
+#
+#   Example:
+#
+#       with RecordFile('pdu1-20260901.dat.bz2','pdu') as records:
+#           columns = records.query(start,stop,['timestamp','RT[0]'])
+#
+#   2026-10-18  Todd Valentic
+#               Initial implementation
+#
+##########################################################################
+
+import os
+import sys
+import bz2
+import mmap
+import array
+import struct
+import bisect
+
+# Map struct codes to array.array typecodes for column storage
+
+TYPECODES = {
+    'b': 'b',
+    'B': 'B',
+    'h': 'h',
+    'H': 'H',
+    'i': 'i',
+    'I': 'I',
+    'f': 'f',
+    'd': 'd'
+}
+
+BLOCKSIZE = 4096
+READAHEAD = 1024*1024
+
+class Layout:
+    """Fixed layout of one record version.
+
+       fields is a list of (name, struct code) pairs, for example
+       ('RT','20f') or ('station','40s'). timefield names the field
+       holding the unix timestamp. If payload is given, it names
+       an integer field holding the length of variable sized data
+       following the fixed header (i.e. camera image pixels).
+    """
+
+    def __init__(self,version,fields,timefield='timestamp',payload=None):
+
+        self.version = version
+        self.fields = fields
+        self.timefield = timefield
+        self.payload = payload
+
+        self.format = ''.join([code for name,code in fields])
+        self.struct = struct.Struct('!'+self.format)
+        self.size = self.struct.size
+
+        self.columns = []       # (column name, struct code)
+        self.offsets = {}       # field name -> byte offset
+
+        offset = 0
+
+        for name,code in fields:
+            self.offsets[name] = offset
+            offset += struct.calcsize('!'+code)
+
+            count,kind = self._splitCode(code)
+
+            if kind == 's' or count == 1:
+                self.columns.append((name,kind))
+            else:
+                for k in range(count):
+                    self.columns.append(('%s[%d]' % (name,k),kind))
+
+        self.names = [name for name,kind in self.columns]
+        self.index = dict([(name,k) for k,name in enumerate(self.names)])
+
+        self.timeStruct = self._fieldStruct(timefield)
+
+        if payload:
+            self.payloadStruct = self._fieldStruct(payload)
+        else:
+            self.payloadStruct = None
+
+        self._blocks = {}
+
+    def _splitCode(self,code):
+        if code[:-1]:
+            return int(code[:-1]),code[-1]
+        return 1,code
+
+    def _fieldStruct(self,name):
+        code = dict(self.fields)[name]
+        return self.offsets[name],struct.Struct('!'+code)
+
+    def blockStruct(self,count):
+        if count not in self._blocks:
+            if len(self._blocks) > 4:
+                self._blocks.clear()
+            self._blocks[count] = struct.Struct('!'+self.format*count)
+        return self._blocks[count]
+
+    def isFixed(self):
+        return self.payload is None
+
+    def timestamp(self,buf,offset):
+        fieldOffset,fieldStruct = self.timeStruct
+        return fieldStruct.unpack_from(buf,offset+fieldOffset)[0]
+
+    def recordSize(self,buf,offset):
+        if self.payloadStruct is None:
+            return self.size
+        fieldOffset,fieldStruct = self.payloadStruct
+        return self.size + fieldStruct.unpack_from(buf,offset+fieldOffset)[0]
+
+    def unpack(self,buf,offset=0):
+        values = self.struct.unpack_from(buf,offset)
+        return self._makeRecord(values)
+
+    def _makeRecord(self,values):
+        record = {}
+        for (name,kind),value in zip(self.columns,values):
+            if kind == 's':
+                value = value.rstrip('\0')
+            record[name] = value
+        return record
+
+    def decode(self,buf,offset,count,names):
+        """Decode count contiguous records into columns."""
+
+        values = self.blockStruct(count).unpack_from(buf,offset)
+        stride = len(self.columns)
+
+        columns = {}
+
+        for name in names:
+            k = self.index[name]
+            kind = self.columns[k][1]
+            column = values[k::stride]
+
+            if kind == 's':
+                columns[name] = [value.rstrip('\0') for value in column]
+            elif kind in TYPECODES:
+                columns[name] = array.array(TYPECODES[kind],column)
+            else:
+                columns[name] = list(column)
+
+        return columns
+
+#-- Registry -------------------------------------------------------------
+
+LAYOUTS = {}
+
+def register(family,layout):
+    LAYOUTS.setdefault(family,{})[layout.version] = layout
+
+def getLayout(family,version):
+
+    try:
+        return LAYOUTS[family][version]
+    except KeyError:
+        raise ValueError('Unknown %s record version: %s' % (family,version))
+
+# PDU monitor (monitor/pdu/monitor.py)
+
+register('pdu',Layout(1,[
+    ('version',     'B'),
+    ('timestamp',   'i'),
+    ('RH',          '8B'),
+    ('RS',          '11B'),
+    ('RT',          '20f'),
+    ('RBME',        '4f'),
+    ('volts',       '12f'),
+    ('amps',        '12f')
+    ]))
+
+# GPS monitor (monitor/gps/monitor.py)
+
+register('gps',Layout(1,[
+    ('version',     'B'),
+    ('sats',        'B'),
+    ('mode',        'B'),
+    ('timestamp',   'i'),
+    ('latitude',    'f'),
+    ('longitude',   'f'),
+    ('altitude',    'f'),
+    ('speed',       'f'),
+    ('track',       'f'),
+    ('climb',       'f')
+    ]))
+
+# Camera monitor (monitor/cameras/monitor.py)
+
+register('camera',Layout(3,[
+    ('version',         'B'),
+    ('start_time',      'i'),
+    ('station',         '40s'),
+    ('latitude',        'f'),
+    ('longitude',       'f'),
+    ('camera_serial',   'i'),
+    ('device_name',     '40s'),
+    ('label',           '40s'),
+    ('instrument',      '40s'),
+    ('exposure_time',   'f'),
+    ('x',               'i'),
+    ('y',               'i'),
+    ('w',               'i'),
+    ('h',               'i'),
+    ('bytes_per_pixel', 'i'),
+    ('bin_x',           'i'),
+    ('bin_y',           'i'),
+    ('ccd_temp',        'f'),
+    ('set_point',       'f'),
+    ('image_bytes',     'i')
+    ],timefield='start_time',payload='image_bytes'))
+
+#-- Sidecar index --------------------------------------------------------
+
+INDEX_MAGIC = 'RIDX'
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct('!4sBcdQQ')
+
+class Index:
+
+    def __init__(self):
+        self.offsets = array.array('d')
+        self.timestamps = array.array('d')
+        self.versions = array.array('B')
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def append(self,offset,version,timestamp):
+        self.offsets.append(offset)
+        self.versions.append(version)
+        self.timestamps.append(timestamp)
+
+    def save(self,filename,mtime,size):
+
+        byteorder = sys.byteorder[0]
+        header = INDEX_HEADER.pack(INDEX_MAGIC,INDEX_VERSION,byteorder,
+                                   mtime,size,len(self))
+
+        tmpname = filename+'.tmp'
+
+        with open(tmpname,'wb') as output:
+            output.write(header)
+            self.offsets.tofile(output)
+            self.timestamps.tofile(output)
+            self.versions.tofile(output)
+
+        os.rename(tmpname,filename)
+
+    def load(self,filename,mtime,size):
+        """Load from filename if it matches the data file, else False."""
+
+        try:
+            input = open(filename,'rb')
+        except IOError:
+            return False
+
+        with input:
+            header = input.read(INDEX_HEADER.size)
+
+            if len(header) != INDEX_HEADER.size:
+                return False
+
+            magic,version,byteorder,imtime,isize,count = \
+                INDEX_HEADER.unpack(header)
+
+            if magic != INDEX_MAGIC or version != INDEX_VERSION:
+                return False
+
+            if byteorder != sys.byteorder[0]:
+                return False
+
+            if imtime != mtime or isize != size:
+                return False
+
+            try:
+                self.offsets.fromfile(input,count)
+                self.timestamps.fromfile(input,count)
+                self.versions.fromfile(input,count)
+            except EOFError:
+                self.__init__()
+                return False
+
+        return True
+
+#-- Reader ---------------------------------------------------------------
+
+class RecordFile:
+
+    def __init__(self,filename,family,useIndex=True):
+
+        self.filename = filename
+        self.family = family
+        self.compressed = filename.endswith('.bz2')
+
+        if family not in LAYOUTS:
+            raise ValueError('Unknown record family: %s' % family)
+
+        self.layouts = LAYOUTS[family]
+
+        self._open()
+
+        info = os.stat(filename)
+        indexname = filename+'.idx'
+
+        self.index = Index()
+
+        if not useIndex or not self.index.load(indexname,info.st_mtime,info.st_size):
+            self._scan()
+            if useIndex:
+                try:
+                    self.index.save(indexname,info.st_mtime,info.st_size)
+                except (IOError,OSError):
+                    pass    # read-only archive, keep it in memory
+
+        self.offsets = self.index.offsets
+        self.timestamps = self.index.timestamps
+        self.versions = self.index.versions
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.index)
+
+    #-- Internal methods -------------------------------------------------
+
+    def _open(self):
+
+        if self.compressed:
+            self.stream = bz2.BZ2File(self.filename)
+            self.data = None
+            self.size = None
+            self.buffer = ''
+            self.bufoffset = 0
+        else:
+            self.stream = open(self.filename,'rb')
+            self.size = os.fstat(self.stream.fileno()).st_size
+            if self.size:
+                self.data = mmap.mmap(self.stream.fileno(),0,
+                                      access=mmap.ACCESS_READ)
+            else:
+                self.data = ''
+
+    def _read(self,offset,size):
+        """Return (buffer, offset in buffer) for the requested bytes."""
+
+        if self.data is not None:
+            if offset+size > self.size:
+                raise EOFError('Truncated record at %d' % offset)
+            return self.data,offset
+
+        # Compressed stream - serve from a read ahead buffer. BZ2File
+        # seeks forward by decompressing and discarding, and rewinds
+        # automatically if we need to go backwards.
+
+        bufstart = self.bufoffset
+        bufend = bufstart+len(self.buffer)
+
+        if bufstart <= offset and offset+size <= bufend:
+            return self.buffer,offset-bufstart
+
+        if bufstart <= offset < bufend:
+            tail = self.buffer[offset-bufstart:]
+        else:
+            self.stream.seek(offset)
+            tail = ''
+
+        need = max(size,READAHEAD)-len(tail)
+
+        self.buffer = tail+self.stream.read(need)
+        self.bufoffset = offset
+
+        if len(self.buffer) < size:
+            raise EOFError('Truncated record at %d' % offset)
+
+        return self.buffer,0
+
+    def _peekVersion(self,offset):
+
+        try:
+            buf,pos = self._read(offset,1)
+        except EOFError:
+            return None
+
+        return ord(buf[pos])
+
+    def _scan(self):
+
+        offset = 0
+
+        while True:
+            version = self._peekVersion(offset)
+
+            if version is None:
+                break
+
+            layout = getLayout(self.family,version)
+
+            try:
+                buf,pos = self._read(offset,layout.size)
+            except EOFError:
+                break   # partial record at the end (still being written)
+
+            timestamp = layout.timestamp(buf,pos)
+            size = layout.recordSize(buf,pos)
+
+            self.index.append(offset,version,timestamp)
+
+            offset += size
+
+    def _runs(self,start,stop):
+        """Split [start,stop) into runs of same-version contiguous records."""
+
+        k = start
+
+        while k < stop:
+            version = self.versions[k]
+            layout = self.layouts[version]
+            end = k+1
+
+            if layout.isFixed():
+                while end < stop and self.versions[end] == version \
+                        and end-k < BLOCKSIZE:
+                    end += 1
+
+            yield layout,k,end
+            k = end
+
+    def _slice(self,start,stop):
+        count = len(self)
+        if stop is None or stop > count:
+            stop = count
+        return max(start,0),stop
+
+    #-- Public methods ---------------------------------------------------
+
+    def close(self):
+
+        if isinstance(self.data,mmap.mmap):
+            self.data.close()
+        self.data = None
+        self.buffer = ''
+
+        if self.stream:
+            self.stream.close()
+        self.stream = None
+
+    def layout(self,index):
+        return self.layouts[self.versions[index]]
+
+    def record(self,index):
+        """Random access to one record as a dict of values."""
+
+        layout = self.layout(index)
+        buf,pos = self._read(int(self.offsets[index]),layout.size)
+
+        return layout.unpack(buf,pos)
+
+    def payload(self,index):
+        """Variable length data (i.e. image pixels) following the record."""
+
+        layout = self.layout(index)
+
+        if layout.isFixed():
+            return None
+
+        offset = int(self.offsets[index])
+        buf,pos = self._read(offset,layout.size)
+        size = layout.recordSize(buf,pos)-layout.size
+
+        buf,pos = self._read(offset+layout.size,size)
+
+        return buffer(buf,pos,size)
+
+    def find(self,starttime=None,stoptime=None):
+        """Index range [start,stop) of records in [starttime,stoptime)."""
+
+        if starttime is None:
+            start = 0
+        else:
+            start = bisect.bisect_left(self.timestamps,starttime)
+
+        if stoptime is None:
+            stop = len(self)
+        else:
+            stop = bisect.bisect_left(self.timestamps,stoptime)
+
+        return start,stop
+
+    def blocks(self,start=0,stop=None,fields=None):
+        """Generator of column dicts, one per run of records."""
+
+        start,stop = self._slice(start,stop)
+
+        for layout,first,last in self._runs(start,stop):
+
+            names = fields or layout.names
+            names = [name for name in names if name in layout.index]
+
+            offset = int(self.offsets[first])
+            count = last-first
+
+            buf,pos = self._read(offset,layout.size*count)
+
+            yield layout.decode(buf,pos,count,names)
+
+    def columns(self,start=0,stop=None,fields=None):
+        """Decode records [start,stop) into one dict of columns."""
+
+        result = {}
+
+        for block in self.blocks(start,stop,fields):
+            for name,values in block.items():
+                if name in result:
+                    result[name].extend(values)
+                else:
+                    result[name] = values
+
+        return result
+
+    def query(self,starttime=None,stoptime=None,fields=None):
+        """Columns for records with starttime <= timestamp < stoptime."""
+
+        start,stop = self.find(starttime,stoptime)
+        return self.columns(start,stop,fields)
+
+def read(filename,family,fields=None):
+    with RecordFile(filename,family) as records:
+        return records.columns(fields=fields)
+
+if __name__ == '__main__':
+
+    import time
+
+    if len(sys.argv) < 3:
+        print 'Usage: recordfile.py family filename [field ...]'
+        sys.exit(1)
+
+    family = sys.argv[1]
+    filename = sys.argv[2]
+    fields = sys.argv[3:] or None
+
+    starttime = time.time()
+
+    with RecordFile(filename,family) as records:
+        columns = records.columns(fields=fields)
+        count = len(records)
+
+    elapsed = time.time()-starttime
+
+    print 'Loaded %d records in %.3fs' % (count,elapsed)
+
+    for name in sorted(columns):
+        values = columns[name]
+        if values:
+            print '  %-20s %s .. %s' % (name,values[0],values[-1])
+
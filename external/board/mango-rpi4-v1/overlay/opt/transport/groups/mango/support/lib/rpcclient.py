@@ -0,0 +1,343 @@
+#!/usr/bin/env python2
+
+##########################################################################
+#
+#   XML-RPC service client
+#
+#   Wraps a service proxy (i.e. from self.connect()) to cut down on
+#   the RPC chatter between processes:
+#
+#       - One proxy per service is kept and reused, so the underlying
+#         HTTP connection is kept open when the server allows it.
+#
+#       - Idempotent reads (status, list, best, ...) can be memoized
+#         for a short time-to-live. Any other call through the client
+#         clears the memo since it may have changed the state.
+#
+#       - Calls can be batched into one round trip with system.multicall.
+#         If the server does not support it, the batch falls back to
+#         sequential calls. With faults=True, a call that fails on the
+#         server gives its Fault in the results instead of raising. If
+#         the sequential calls can't reach the server part way through,
+#         that error is given for the rest of the calls (not sent), so
+#         the ones already done aren't repeated.
+#
+#       - Per-method call counts, memo hits, errors and latency are
+#         kept so we can see what a scheduler loop costs.
+#
+#   Example:
+#
+#       pductl = ServiceClient(self.connect('pductl'),'pductl',
+#                              ttl={'status':5,'list':60})
+#
+#       batch = pductl.batch()
+#       batch.status('pdu1')
+#       batch.status('pdu2')
+#       pdu1,pdu2 = batch()
+#
+#   2026-10-18  Todd Valentic
+#               Initial implementation
+#
+##########################################################################
+
+import time
+import socket
+import logging
+import threading
+import xmlrpclib
+
+class MethodStats:
+
+    def __init__(self):
+        self.calls = 0
+        self.hits = 0
+        self.errors = 0
+        self.secs = 0.0
+        self.maxsecs = 0.0
+
+    def record(self,elapsed):
+        self.calls += 1
+        self.secs += elapsed
+        self.maxsecs = max(self.maxsecs,elapsed)
+
+    def asDict(self):
+
+        if self.calls:
+            avgsecs = self.secs/self.calls
+        else:
+            avgsecs = 0.0
+
+        return dict(
+            calls   = self.calls,
+            hits    = self.hits,
+            errors  = self.errors,
+            secs    = self.secs,
+            avgsecs = avgsecs,
+            maxsecs = self.maxsecs
+            )
+
+class Method:
+
+    def __init__(self,client,name):
+        self.client = client
+        self.name = name
+
+    def __getattr__(self,name):
+        return Method(self.client,'%s.%s' % (self.name,name))
+
+    def __call__(self,*args):
+        return self.client.call(self.name,*args)
+
+class Batch:
+
+    def __init__(self,client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self,name):
+        return BatchMethod(self,name)
+
+    def __len__(self):
+        return len(self.calls)
+
+    def __call__(self):
+        calls = self.calls
+        self.calls = []
+        return self.client.callMany(calls)
+
+class BatchMethod:
+
+    def __init__(self,batch,name):
+        self.batch = batch
+        self.name = name
+
+    def __call__(self,*args):
+        self.batch.calls.append((self.name,args))
+
+class ServiceClient:
+
+    def __init__(self,proxy,name='service',ttl=None,log=None):
+
+        self.proxy = proxy
+        self.name = name
+        self.ttl = dict(ttl or {})
+        self.log = log or logging
+
+        self.memo = {}
+        self.stats = {}
+        self.multicall = True
+
+        self.lock = threading.RLock()
+
+    def __getattr__(self,name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return Method(self,name)
+
+    #-- Internal methods -------------------------------------------------
+
+    def _stats(self,method):
+        if method not in self.stats:
+            self.stats[method] = MethodStats()
+        return self.stats[method]
+
+    def _memoKey(self,method,args):
+        try:
+            key = (method,args)
+            hash(key)
+            return key
+        except TypeError:
+            return None
+
+    def _lookup(self,method,args):
+
+        if method not in self.ttl:
+            return False,None
+
+        key = self._memoKey(method,args)
+
+        if key not in self.memo:
+            return False,None
+
+        timestamp,value = self.memo[key]
+
+        if time.time()-timestamp > self.ttl[method]:
+            del self.memo[key]
+            return False,None
+
+        return True,value
+
+    def _store(self,method,args,value):
+
+        if method in self.ttl:
+            key = self._memoKey(method,args)
+            if key is not None:
+                self.memo[key] = (time.time(),value)
+        else:
+            # May have changed server state
+            self.memo.clear()
+
+    def _invoke(self,method,args):
+
+        func = self.proxy
+        for part in method.split('.'):
+            func = getattr(func,part)
+
+        return func(*args)
+
+    #-- Public methods ---------------------------------------------------
+
+    def call(self,method,*args):
+
+        with self.lock:
+
+            found,value = self._lookup(method,args)
+
+            if found:
+                self._stats(method).hits += 1
+                return value
+
+            stats = self._stats(method)
+            start = time.time()
+
+            try:
+                value = self._invoke(method,args)
+            except:
+                stats.errors += 1
+                raise
+            finally:
+                stats.record(time.time()-start)
+
+            self._store(method,args,value)
+
+            return value
+
+    def _callEach(self,calls,faults):
+
+        if not faults:
+            return [self.call(method,*args) for method,args in calls]
+
+        results = []
+
+        for method,args in calls:
+            try:
+                results.append(self.call(method,*args))
+            except xmlrpclib.Fault,e:
+                results.append(e)
+            except (socket.error,xmlrpclib.ProtocolError,IOError),e:
+                # The rest were not sent
+                results.extend([e]*(len(calls)-len(results)))
+                break
+
+        return results
+
+    def callMany(self,calls,faults=False):
+        """Run a list of (method,args) in one round trip if possible.
+
+           If faults is True, a Fault from one of the calls is put in
+           its place in the results rather than raised. When the calls
+           are made one at a time, a socket or protocol error is put in
+           the place of the call that hit it and of the ones after it.
+           A multicall is one request, so if it fails it still raises.
+        """
+
+        if not calls:
+            return []
+
+        if len(calls) == 1 or not self.multicall:
+            return self._callEach(calls,faults)
+
+        with self.lock:
+
+            results = [None]*len(calls)
+            pending = []
+
+            for index,(method,args) in enumerate(calls):
+                found,value = self._lookup(method,args)
+                if found:
+                    self._stats(method).hits += 1
+                    results[index] = value
+                else:
+                    pending.append(index)
+
+            if not pending:
+                return results
+
+            multicall = xmlrpclib.MultiCall(self.proxy)
+
+            for index in pending:
+                method,args = calls[index]
+                func = multicall
+                for part in method.split('.'):
+                    func = getattr(func,part)
+                func(*args)
+
+            stats = self._stats('system.multicall')
+            start = time.time()
+
+            try:
+                values = multicall()
+            except xmlrpclib.Fault,e:
+                stats.errors += 1
+                if 'multicall' not in e.faultString:
+                    raise
+                self.log.info('%s: no multicall support, batching disabled' % self.name)
+                self.multicall = False
+                return self.callMany(calls,faults)
+            except:
+                stats.errors += 1
+                raise
+            finally:
+                stats.record(time.time()-start)
+
+            # Accessing a failed entry raises its Fault
+
+            for position,index in enumerate(pending):
+                method,args = calls[index]
+                stats = self._stats(method)
+                stats.calls += 1
+                try:
+                    value = values[position]
+                except xmlrpclib.Fault,e:
+                    stats.errors += 1
+                    if not faults:
+                        raise
+                    results[index] = e
+                    continue
+                self._store(method,args,value)
+                results[index] = value
+
+            return results
+
+    def batch(self):
+        return Batch(self)
+
+    def invalidate(self,method=None):
+
+        with self.lock:
+            if method is None:
+                self.memo.clear()
+            else:
+                for key in self.memo.keys():
+                    if key[0] == method:
+                        del self.memo[key]
+
+    def getStats(self):
+
+        with self.lock:
+            return dict([(method,stats.asDict()) for method,stats in self.stats.items()])
+
+    def resetStats(self):
+
+        with self.lock:
+            self.stats = {}
+
+    def logStats(self,log=None):
+
+        log = log or self.log
+
+        for method,stats in sorted(self.getStats().items()):
+            log.info('rpc %s.%s: %d calls, %d hits, %d errors, avg %.1fms, max %.1fms' % (
+                self.name,method,stats['calls'],stats['hits'],stats['errors'],
+                stats['avgsecs']*1000,stats['maxsecs']*1000))
+
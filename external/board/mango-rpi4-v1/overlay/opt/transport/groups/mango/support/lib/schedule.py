@@ -33,6 +33,14 @@
 #               Add try..except around Schedule creation.
 #               Default windowMax to None
 #
+#   2026-10-18  Todd Valentic
+#               Parse time.start/time.stop once per year instead of
+#                   on every match().
+#               ScheduleManager builds a sorted timeline of the times
+#                   the matching schedule changes, so match() is a
+#                   binary search.
+#               Only glob/stat the schedule files every checkRate secs.
+#
 #####################################################################
 
 from ExtendedConfigParser import ExtendedConfigParser
@@ -41,6 +49,7 @@ from Transport.Util.dateutil.relativedelta import relativedelta
 from Transport.Util import datefunc
 
 import datetime
+import bisect
 import time
 import os
 import glob
@@ -59,6 +68,7 @@ class Schedule:
     def __init__(self,name,config):
 
         self.name = name
+        self.spans = {}
 
         # Add get* method names here that call config.getX(name,...)
         # This lets us lookup schedule specific config values
@@ -94,10 +104,17 @@ class Schedule:
             self.windowOffset = datefunc.timedelta_as_seconds(self.windowOffset)
             self.windowSpan = datefunc.timedelta_as_seconds(self.windowSpan)
 
-    def match(self,targetTime):
+    def getSpan(self,year):
+        """Start and stop times for the given year (None if open)."""
 
-        now = datetime.datetime.now()
-        thisYear = datetime.datetime(now.year,1,1)
+        if year not in self.spans:
+            self.spans[year] = self.parseSpan(year)
+
+        return self.spans[year]
+
+    def parseSpan(self,year):
+
+        thisYear = datetime.datetime(year,1,1)
 
         try:
             startTime = parser.parse(self.startTime,default=thisYear)
@@ -118,6 +135,13 @@ class Schedule:
             if stopTime < startTime:
                 stopTime += relativedelta(years=1)
 
+        return startTime,stopTime
+
+    def match(self,targetTime):
+
+        now = datetime.datetime.now()
+        startTime,stopTime = self.getSpan(now.year)
+
         if startTime and targetTime<startTime:
             return False
 
@@ -141,17 +165,21 @@ class Schedule:
 
 class ScheduleManager:
 
-    def __init__(self,log):
+    def __init__(self,log,checkRate=0):
 
         self.log = log
+        self.checkRate = checkRate
+        self.checkTime = 0
         self.filetimes = {}
         self.schedules = []
+        self.timeline = None
 
     def load(self,filenames):
 
         self.log.info('Loading schedules:')
 
         self.schedules = []
+        self.timeline = None
 
         config = ExtendedConfigParser()
 
@@ -175,6 +203,13 @@ class ScheduleManager:
 
     def reload(self,filespecs):
 
+        now = time.time()
+
+        if self.checkRate and self.filetimes and now<self.checkTime:
+            return False
+
+        self.checkTime = now + self.checkRate
+
         filenames = []
 
         for filespec in filespecs:
@@ -207,7 +242,7 @@ class ScheduleManager:
 
         return reload
 
-    def match(self,time):
+    def matchAll(self,time):
 
         for priority,schedule in self.schedules:
             if schedule.match(time):
@@ -215,6 +250,44 @@ class ScheduleManager:
 
         return None
 
+    def buildTimeline(self,year):
+
+        # The matching schedule can only change at a start or stop
+        # time, so find the match once for each interval between them.
+
+        boundaries = set()
+
+        for priority,schedule in self.schedules:
+            for boundary in schedule.getSpan(year):
+                if boundary:
+                    boundaries.add(boundary)
+
+        boundaries = sorted(boundaries)
+
+        if boundaries:
+            first = boundaries[0] - datetime.timedelta(days=1)
+        else:
+            first = datetime.datetime.now(utc)
+
+        matches = [self.matchAll(t) for t in [first]+boundaries]
+
+        self.timeline = (year,boundaries,matches)
+
+    def getTimeline(self):
+
+        year = datetime.datetime.now().year
+
+        if not self.timeline or self.timeline[0]!=year:
+            self.buildTimeline(year)
+
+        return self.timeline
+
+    def match(self,time):
+
+        year,boundaries,matches = self.getTimeline()
+
+        return matches[bisect.bisect_right(boundaries,time)]
+
 
 if __name__ == '__main__':
 
@@ -0,0 +1,678 @@
+#!/usr/bin/env python2
+
+##########################################################################
+#
+#   System status collector
+#
+#   Persistent version of systemstatus.py for processes that sample the
+#   computer health over and over:
+#
+#       - The /proc files are opened once and re-read from the start
+#         on each update (seek to 0), rather than opened and split up
+#         from scratch every time.
+#
+#       - /proc/mounts is only parsed again when its contents change.
+#         MAC addresses, board, firmware and transport versions are
+#         only looked up every staticRate secs, since they need extra
+#         files or commands (vcgencmd) and don't change while running.
+#
+#       - The results are plain dicts of numbers and strings (bytes
+#         are floats so they fit in XML-RPC), not INI text. Counters
+#         and a few gauges carry the change since the last update and
+#         the rate per sec in 'delta' and 'rate'.
+#
+#       - The CPU and wall time of each update (and of each section
+#         with profile=True) are kept in the 'collector' entry.
+#
+#   toConfig() turns a sample back into the systemstatus.py INI text
+#   for the saved output files and older readers.
+#
+#   Example:
+#
+#       collector = SystemCollector()
+#       data = collector.update()
+#
+#       data['mounts']['/data']['freebytes']
+#       data['network']['eth0']['rate']['rx.bytes']
+#
+#       collector.freeBytes('/data')
+#
+#   2026-10-18  Todd Valentic
+#               Initial implementation (from systemstatus.py)
+#
+##########################################################################
+
+from datetime import datetime
+
+import calendar
+import commands
+import ConfigParser
+import glob
+import logging
+import os
+import StringIO
+import time
+
+VERSION = "1.2.0"
+
+TRANSPORT_DIR = '/opt/transport'
+
+NET_FIELDS = ['bytes','packets','errs','drop']
+
+BOARD_KEYS = ['hardware','revision','serial','model',
+              'bootloader.version','bootloader.timestamp',
+              'bootloader.update-time','bootloader.capabilities',
+              'firmware.version','firmware.date']
+
+class ProcFile:
+    """Keeps a /proc (or /sys) file open and re-reads it from the start."""
+
+    def __init__(self,path):
+        self.path = path
+        self.fd = None
+
+    def read(self):
+
+        for attempt in range(2):
+
+            try:
+                if self.fd is None:
+                    self.fd = os.open(self.path,os.O_RDONLY)
+
+                os.lseek(self.fd,0,os.SEEK_SET)
+
+                chunks = []
+                while True:
+                    chunk = os.read(self.fd,16384)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+
+                return ''.join(chunks)
+
+            except OSError:
+                self.close()
+                if attempt:
+                    raise
+
+    def close(self):
+        if self.fd is not None:
+            try:
+                os.close(self.fd)
+            except OSError:
+                pass
+            self.fd = None
+
+class Tracker:
+    """Change and rate per sec between updates of named values."""
+
+    def __init__(self):
+        self.previous = {}
+
+    def update(self,name,value,now,counter=False):
+
+        if name not in self.previous:
+            self.previous[name] = (value,now)
+            return 0.0,0.0
+
+        prevValue,prevTime = self.previous[name]
+        self.previous[name] = (value,now)
+
+        delta = value-prevValue
+
+        if counter and delta < 0:
+            # Rollover (32 or 64 bit) or the counter was reset
+            if prevValue < 2**32:
+                delta += 2**32
+            else:
+                delta += 2**64
+            if delta < 0 or delta > 2**32:
+                delta = value
+
+        elapsed = now-prevTime
+
+        if elapsed > 0:
+            rate = delta/elapsed
+        else:
+            rate = 0.0
+
+        return float(delta),float(rate)
+
+    def forget(self,prefix):
+        for name in self.previous.keys():
+            if name.startswith(prefix):
+                del self.previous[name]
+
+class SystemCollector:
+
+    def __init__(self,staticRate=3600,profile=False,log=None):
+
+        self.staticRate = staticRate
+        self.profile = profile
+        self.log = log or logging
+
+        self.files = {}
+        self.tracker = Tracker()
+
+        self.mountText = None
+        self.mountList = []
+        self.static = {}
+        self.staticTime = None
+        self.macaddrs = {}
+
+        self.data = None
+        self.cycles = 0
+        self.totalCpu = 0.0
+
+    def _read(self,path):
+
+        if path not in self.files:
+            self.files[path] = ProcFile(path)
+
+        return self.files[path].read()
+
+    #-- Sections ---------------------------------------------------------
+
+    def updateMounts(self,data,now):
+
+        text = self._read('/proc/mounts')
+
+        if text != self.mountText:
+            self.mountText = text
+            self.mountList = []
+            for line in text.split('\n'):
+                fields = line.split()
+                if len(fields) >= 4:
+                    self.mountList.append(fields[0:4])
+
+        mounts = {}
+        paths = []
+
+        for device,path,fstype,access in self.mountList:
+
+            if path in mounts:
+                continue
+
+            info = self.statvfs(path)
+
+            if info is None:
+                continue
+
+            info.update(device=device,fstype=fstype,access=access)
+
+            key = 'mount:%s:' % path
+            delta = {}
+            rate = {}
+
+            for field in ['freebytes','usedbytes']:
+                delta[field],rate[field] = \
+                    self.tracker.update(key+field,info[field],now)
+
+            info['delta'] = delta
+            info['rate'] = rate
+
+            mounts[path] = info
+            paths.append(path)
+
+        data['mounts'] = mounts
+        data['mountList'] = paths
+
+    def statvfs(self,path):
+
+        try:
+            info = os.statvfs(path)
+        except OSError:
+            return None
+
+        if info.f_blocks==0:
+            return None
+
+        totalbytes  = float(info.f_blocks*info.f_bsize)
+        freebytes   = float(info.f_bavail*info.f_bsize)
+        reserved    = info.f_bfree*info.f_bsize-freebytes
+        totalavail  = totalbytes-reserved
+        usedbytes   = totalavail-freebytes
+
+        if totalavail > 0:
+            usedpct = usedbytes/totalavail*100
+        else:
+            usedpct = 0.0
+
+        return dict(
+            totalbytes  = totalavail,
+            freebytes   = freebytes,
+            usedbytes   = usedbytes,
+            usedpct     = usedpct
+            )
+
+    def updateMemory(self,data,now):
+
+        lines = self._read('/proc/meminfo').split('\n')
+
+        if 'total:' in lines[0]:     # old style format
+            lines=lines[3:]
+
+        memory = {}
+        keys = []
+
+        for line in lines:
+            try:
+                key,value = line.split(':')
+                memory[key] = float(int(value.split()[0])*1024)
+                keys.append(key)
+            except:
+                pass
+
+        data['memory'] = memory
+        data['memoryList'] = keys
+
+    def updateLoad(self,data,now):
+
+        load = self._read('/proc/loadavg').split()
+
+        data['load'] = {
+            '1min':     float(load[0]),
+            '5min':     float(load[1]),
+            '15min':    float(load[2])
+            }
+
+    def updateUptime(self,data,now):
+        data['uptime'] = float(self._read('/proc/uptime').split()[0])
+
+    def updateNetwork(self,data,now):
+
+        lines = self._read('/proc/net/dev').split('\n')[2:]
+
+        network = {}
+        devices = []
+
+        for line in lines:
+
+            if ':' not in line:
+                continue
+
+            name,values = line.split(':',1)
+            name        = name.strip()
+            values      = [int(x) for x in values.split()]
+
+            if name not in self.macaddrs:
+                self.macaddrs[name] = self.macaddr(name)
+
+            entry = dict(macaddr=self.macaddrs[name])
+            delta = {}
+            rate = {}
+
+            for direction,offset in [('rx',0),('tx',8)]:
+
+                counters = {}
+
+                for index,field in enumerate(NET_FIELDS):
+                    value = values[offset+index]
+                    counters[field] = float(value)
+                    label = '%s.%s' % (direction,field)
+                    delta[label],rate[label] = self.tracker.update(
+                        'net:%s:%s' % (name,label),value,now,counter=True)
+
+                entry[direction] = counters
+
+            entry['delta'] = delta
+            entry['rate'] = rate
+
+            network[name] = entry
+            devices.append(name)
+
+        for name in self.macaddrs.keys():
+            if name not in network:
+                del self.macaddrs[name]
+                self.tracker.forget('net:%s:' % name)
+
+        data['network'] = network
+        data['devices'] = devices
+
+    def macaddr(self,name):
+        try:
+            return open('/sys/class/net/%s/address' % name).read().strip()
+        except IOError:
+            return ''
+
+    def updateSwaps(self,data,now):
+
+        lines = self._read('/proc/swaps').split('\n')
+
+        swaps = {}
+        devices = []
+
+        for line in lines[1:]:
+            try:
+                dev,type,size,used,priority = line.split()
+            except:
+                continue
+            devices.append(dev)
+            swaps[dev] = dict(
+                type        = type,
+                size        = float(int(size)*1024),
+                used        = float(int(used)*1024),
+                priority    = int(priority)
+                )
+
+        data['swaps'] = swaps
+        data['swapList'] = devices
+
+    def updateTemps(self,data,now):
+
+        temps = {}
+
+        for zone in self.static.get('zones',[]):
+            try:
+                text = self._read(os.path.join(zone,'temp'))
+                temps[os.path.basename(zone)] = float(text.strip())/1000
+            except (OSError,ValueError):
+                continue
+
+        data['temperature'] = temps
+
+    #-- Static information (refreshed every staticRate secs) -------------
+
+    def updateStatic(self,now):
+
+        static = {}
+
+        static['zones'] = sorted(glob.glob('/sys/class/thermal/thermal_zone*'))
+        static['transport'] = self.readTransport()
+
+        board = self.readBoardInfo()
+
+        if os.path.exists('/usr/bin/vcgencmd'):
+            board.update(self.readBootloaderVersion())
+            board.update(self.readFirmwareVersion())
+
+        static['board'] = board
+
+        self.static = static
+        self.staticTime = now
+        self.macaddrs = {}
+
+    def readTransport(self):
+
+        info = {}
+
+        cmd = "grep version %s/etc/transportd.conf" % TRANSPORT_DIR
+        status, output = commands.getstatusoutput(cmd)
+
+        if status == 0:
+            key, value = [v.strip() for v in output.split(":")]
+            info[key] = value
+
+        for filename in glob.glob("%s/groups/**/release.conf" % TRANSPORT_DIR):
+            group = filename.replace(TRANSPORT_DIR+"/groups", "")
+            group = group.replace("release.conf", "")[1:-1]
+            config = ConfigParser.ConfigParser()
+            config.read(filename)
+
+            for key, value in config.defaults().items():
+                info["%s.%s" % (group, key)] = value
+
+        return info
+
+    def readFirmwareVersion(self):
+
+        cmd = "sudo /usr/bin/vcgencmd version"
+        status, output = commands.getstatusoutput(cmd)
+
+        if status != 0:
+            return {}
+
+        lines = output.split("\n")
+        info = {}
+
+        for line in lines:
+            line = line.strip()
+            try:
+                key, value = line.split()[:2]
+            except:
+                continue
+
+            info[key] = value
+
+        try:
+            fmt = "%b %d %Y %H:%M:%S"
+            tmtuple = datetime.strptime(lines[0].strip(), fmt).timetuple()
+            info["date"] = calendar.timegm(tmtuple)
+        except:
+            info["date"] = ""
+
+        return {
+            "firmware.version": info.get("version", ""),
+            "firmware.date":    info.get("date", "")
+            }
+
+    def readBootloaderVersion(self):
+
+        cmd = "sudo /usr/bin/vcgencmd bootloader_version"
+        status, output = commands.getstatusoutput(cmd)
+
+        if status != 0:
+            return {}
+
+        info = {}
+
+        for line in output.split("\n"):
+            try:
+                key, value = line.split()[:2]
+            except:
+                continue
+
+            info[key] = value
+
+        return {
+            "bootloader.version":       info.get("version", ""),
+            "bootloader.timestamp":     info.get("timestamp", ""),
+            "bootloader.update-time":   info.get("update-time", ""),
+            "bootloader.capabilities":  info.get("capabilities", "")
+            }
+
+    def readBoardInfo(self):
+
+        info = {}
+
+        for line in open('/proc/cpuinfo').read().split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                key, value = line.split(":")
+                key = key.strip()
+            except:
+                continue
+
+            info[key] = value
+
+        return {
+            "hardware": info.get("Hardware", ""),
+            "revision": info.get("Revision", ""),
+            "serial":   info.get("Serial", ""),
+            "model":    info.get("Model", "")
+            }
+
+    #-- Public methods ---------------------------------------------------
+
+    def update(self):
+        """Take a new sample and return it."""
+
+        now = time.time()
+        startCpu = time.clock()
+
+        if self.staticTime is None or now-self.staticTime >= self.staticRate:
+            self.updateStatic(now)
+
+        data = dict(timestamp=now,version=VERSION)
+
+        if self.data:
+            data['elapsed'] = now-self.data['timestamp']
+        else:
+            data['elapsed'] = 0.0
+
+        sections = {}
+
+        for name,func in [
+                ('mounts',      self.updateMounts),
+                ('memory',      self.updateMemory),
+                ('load',        self.updateLoad),
+                ('uptime',      self.updateUptime),
+                ('network',     self.updateNetwork),
+                ('swaps',       self.updateSwaps),
+                ('temperature', self.updateTemps)
+                ]:
+
+            start = time.clock()
+
+            try:
+                func(data,now)
+            except:
+                self.log.exception('Problem reading %s' % name)
+
+            if self.profile:
+                sections[name] = time.clock()-start
+
+        data['transport'] = self.static['transport']
+        data['board'] = self.static['board']
+
+        cpu = time.clock()-startCpu
+
+        self.cycles += 1
+        self.totalCpu += cpu
+
+        data['collector'] = dict(
+            cycles  = self.cycles,
+            cpu     = cpu,
+            avgcpu  = self.totalCpu/self.cycles,
+            wall    = time.time()-now,
+            files   = len(self.files)
+            )
+
+        if self.profile:
+            data['collector']['sections'] = sections
+
+        self.data = data
+
+        return data
+
+    def freeBytes(self,path,refresh=True):
+        """Free bytes for a mount, None if it isn't mounted."""
+
+        if refresh:
+            info = self.statvfs(path)
+            return info and info['freebytes']
+
+        try:
+            return self.data['mounts'][path]['freebytes']
+        except (TypeError,KeyError):
+            return None
+
+    def interfaceRates(self,name):
+        """Latest rx/tx bytes per sec for a network interface."""
+
+        try:
+            rate = self.data['network'][name]['rate']
+        except (TypeError,KeyError):
+            return None
+
+        return dict(rx=rate['rx.bytes'],tx=rate['tx.bytes'])
+
+    def close(self):
+        for file in self.files.values():
+            file.close()
+        self.files = {}
+
+def _number(value):
+    # Bytes are floats in the sample, integers in the INI text
+
+    if isinstance(value,float) and value.is_integer():
+        return str(int(value))
+
+    return str(value)
+
+def toConfig(data):
+    """Render a sample as the systemstatus.py INI text."""
+
+    stats = ConfigParser.ConfigParser()
+    stats.add_section('System')
+    stats.set('System','timestamp',str(datetime.fromtimestamp(data['timestamp'])))
+    stats.set("System", "version", data['version'])
+
+    for path in data.get('mountList',[]):
+        if stats.has_section(path):
+            continue
+        info = data['mounts'][path]
+        stats.add_section(path)
+        for key in ['device','fstype','access','totalbytes','freebytes',
+                    'usedbytes']:
+            stats.set(path,key,_number(info[key]))
+        stats.set(path,'usedpct',str(info['usedpct']))
+
+    stats.set('System','mounts',' '.join(data.get('mountList',[])))
+
+    section = 'Memory'
+    stats.add_section(section)
+    for key in data.get('memoryList',[]):
+        stats.set(section,key,_number(data['memory'][key]))
+
+    section = 'Load'
+    stats.add_section(section)
+    for key in ['1min','5min','15min']:
+        if key in data.get('load',{}):
+            stats.set(section,key,'%.2f' % data['load'][key])
+
+    section = 'Uptime'
+    stats.add_section(section)
+    if 'uptime' in data:
+        stats.set(section,'seconds',str(data['uptime']))
+
+    section = 'Network'
+    stats.add_section(section)
+
+    for name in data.get('devices',[]):
+        entry = data['network'][name]
+        stats.set(section,name+'.macaddr',entry['macaddr'])
+        for direction in ['rx','tx']:
+            prefix = '%s.%s.' % (name,direction)
+            stats.set(section,prefix+'rate',_number(entry['rate'][direction+'.bytes']))
+            for field in NET_FIELDS:
+                stats.set(section,prefix+field,_number(entry[direction][field]))
+
+    stats.set(section,'devices',' '.join(data.get('devices',[])))
+
+    section = 'Swaps'
+    stats.add_section(section)
+
+    for dev in data.get('swapList',[]):
+        info = data['swaps'][dev]
+        stats.set(section,dev+'.type',info['type'])
+        stats.set(section,dev+'.size',_number(info['size']))
+        stats.set(section,dev+'.used',_number(info['used']))
+        stats.set(section,dev+'.priority',str(info['priority']))
+
+    stats.set(section,'mounts',' '.join(data.get('swapList',[])))
+
+    section = 'Temperature'
+    stats.add_section(section)
+    for zone,temp in sorted(data.get('temperature',{}).items()):
+        stats.set(section,zone,str(temp))
+
+    section = 'DataTransport'
+    stats.add_section(section)
+    for key,value in data.get('transport',{}).items():
+        stats.set(section,key,str(value))
+
+    if data.get('board'):
+        section = 'Board'
+        stats.add_section(section)
+        for key in BOARD_KEYS:
+            if key in data['board']:
+                stats.set(section,key,str(data['board'][key]))
+
+    buffer = StringIO.StringIO()
+    stats.write(buffer)
+
+    return buffer.getvalue()